@@ -0,0 +1,221 @@
+import mmap
+import os
+import struct
+
+from decoder import decode_bytes, EncodedImageView
+from encoder import (encode_quantized, prepare_square_grayscale, scale_and_quantize,
+                     RESOLUTION_MAP)
+
+# File layout:
+#   [ARCHIVE_MAGIC] [entry blob] ... [entry blob] [index] [footer]
+# Each blob is exactly what encode_image would write to a .bin file.
+# Index entry: name length (uint16), UTF-8 name, offset (uint64),
+#              length (uint32), header byte (uint8)
+# Footer: index offset (uint64), entry count (uint32), FOOTER_MAGIC
+# Appending adds blobs, an index and a footer after the previous footer, so
+# the last complete footer always describes a readable archive.
+ARCHIVE_MAGIC = b"L1AR"
+FOOTER_MAGIC = b"L1IX"
+INDEX_ENTRY = struct.Struct('<QIB')
+NAME_LENGTH = struct.Struct('<H')
+FOOTER = struct.Struct('<QI4s')
+
+
+def _read_index(buffer, footer_position):
+    """Index described by the footer at footer_position, or None if it is not one."""
+    index_offset, entry_count, magic = FOOTER.unpack_from(buffer, footer_position)
+    if magic != FOOTER_MAGIC or not len(ARCHIVE_MAGIC) <= index_offset <= footer_position:
+        return None
+
+    index = {}
+    position = index_offset
+    try:
+        for _ in range(entry_count):
+            if position >= footer_position:
+                return None
+            (name_length,) = NAME_LENGTH.unpack_from(buffer, position)
+            position += NAME_LENGTH.size
+            name = bytes(buffer[position:position + name_length]).decode("utf-8")
+            position += name_length
+            entry = INDEX_ENTRY.unpack_from(buffer, position)
+            position += INDEX_ENTRY.size
+            if entry[0] + entry[1] > index_offset:
+                return None
+            index[name] = entry
+    except (struct.error, UnicodeDecodeError):
+        return None
+
+    # A genuine index ends exactly where its footer starts
+    return index if position == footer_position else None
+
+
+def _parse_index(buffer):
+    """
+    Read the footer and index of an archive held in buffer.
+
+    If the file does not end in a valid footer (an append that never
+    reached close()), the last complete footer before it is used, so the
+    entries committed earlier stay readable.
+
+    Returns:
+    - (committed_end, index): the offset just past the footer used, and the
+      index mapping names to (offset, length, header byte)
+    """
+    if len(buffer) < len(ARCHIVE_MAGIC) + FOOTER.size or \
+            bytes(buffer[:len(ARCHIVE_MAGIC)]) != ARCHIVE_MAGIC:
+        raise ValueError("Not a lab01 archive")
+
+    footer_position = len(buffer) - FOOTER.size
+    index = _read_index(buffer, footer_position)
+    magic_offset = FOOTER.size - len(FOOTER_MAGIC)
+    search_end = len(buffer) - 1
+    while index is None:
+        magic_position = buffer.rfind(FOOTER_MAGIC, len(ARCHIVE_MAGIC) + magic_offset,
+                                      search_end)
+        if magic_position < 0:
+            raise ValueError("Archive footer is missing or corrupt")
+        footer_position = magic_position - magic_offset
+        index = _read_index(buffer, footer_position)
+        search_end = magic_position + len(FOOTER_MAGIC) - 1
+
+    return footer_position + FOOTER.size, index
+
+
+class ArchiveWriter:
+    """
+    Create or append to an archive of encoded images.
+
+    New blobs are appended after the existing footer, and a fresh index and
+    footer are written after them on close(). Until then the old footer
+    still describes the archive, so if the process dies mid-append the
+    previously committed entries stay readable (the next writer drops the
+    unfinished tail). The old index, footer and the blob of a replaced name
+    stay in the file as dead space.
+
+    Usage:
+        with ArchiveWriter("images.l1a") as archive:
+            archive.add_image("cat", "cat.jpg", res_idx=1, depth_idx=2)
+            archive.add_file("dog", "dog.bin")
+    """
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        if os.path.exists(archive_path) and os.path.getsize(archive_path) > 0:
+            # Map rather than read, so only the footer and index pages are loaded
+            with open(archive_path, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as existing:
+                committed_end, self.index = _parse_index(existing)
+            self._file = open(archive_path, "r+b")
+            # Only bytes of an append that never reached close() are dropped
+            self._file.seek(committed_end)
+            self._file.truncate()
+        else:
+            # Start with an empty index, so an archive is readable from the outset
+            self.index = {}
+            self._file = open(archive_path, "wb")
+            self._file.write(ARCHIVE_MAGIC)
+            self._file.write(FOOTER.pack(len(ARCHIVE_MAGIC), 0, FOOTER_MAGIC))
+            self._file.flush()
+
+    def add(self, name, encoded):
+        """Append one encoding (bytes as written by encode_image) under name."""
+        if len(name.encode("utf-8")) > 0xFFFF:
+            raise ValueError("Entry name is too long")
+        offset = self._file.tell()
+        self._file.write(encoded)
+        self.index[name] = (offset, len(encoded), encoded[0])
+
+    def add_file(self, name, binary_file):
+        """Append an existing encoded .bin file."""
+        with open(binary_file, "rb") as f:
+            self.add(name, f.read())
+
+    def add_image(self, name, source_path, res_idx, depth_idx, packed=True, entropy=False):
+        """Encode an image straight into the archive."""
+        processed_img = prepare_square_grayscale(source_path, RESOLUTION_MAP[res_idx])
+        quantized_data = scale_and_quantize(processed_img, res_idx, depth_idx)
+        self.add(name, encode_quantized(quantized_data, res_idx, depth_idx, packed, entropy))
+
+    def close(self):
+        """Write the index and footer and close the file."""
+        if self._file is None:
+            return
+        index_offset = self._file.tell()
+        for name, entry in self.index.items():
+            encoded_name = name.encode("utf-8")
+            self._file.write(NAME_LENGTH.pack(len(encoded_name)) + encoded_name)
+            self._file.write(INDEX_ENTRY.pack(*entry))
+        self._file.write(FOOTER.pack(index_offset, len(self.index), FOOTER_MAGIC))
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class EncodedArchive:
+    """
+    Read-only, memory-mapped archive with O(1) lookup by name.
+
+    The whole archive is mapped once; decode(name) slices the entry out of
+    the map and decodes it exactly like decode_image decodes a .bin file.
+    """
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        self._file = open(archive_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            _, self.index = _parse_index(self._mmap)
+        except ValueError:
+            self.close()
+            raise
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def names(self):
+        """Entry names in insertion order."""
+        return list(self.index)
+
+    def header(self, name):
+        """Header byte of an entry, read from the index alone."""
+        return self.index[name][2]
+
+    def read(self, name):
+        """Raw encoded bytes of an entry (same content as its .bin file)."""
+        offset, length, _ = self.index[name]
+        return self._mmap[offset:offset + length]
+
+    def decode(self, name, res_idx=None):
+        """Decode an entry to the image decode_image would return for it."""
+        offset, length, _ = self.index[name]
+        return decode_bytes(memoryview(self._mmap)[offset:offset + length], res_idx)
+
+    def open_region(self, name, res_idx=None):
+        """Region-addressable view of an entry (see decoder.EncodedImageView)."""
+        offset, length, _ = self.index[name]
+        return EncodedImageView(self.archive_path, res_idx, offset, length)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_archive(archive_path):
+    """Open an archive for random-access reading."""
+    return EncodedArchive(archive_path)
@@ -0,0 +1,142 @@
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from bitpack import packed_row_bytes
+from encoder import (prepare_square_grayscale, scale_and_quantize, encode_quantized,
+                     RESOLUTION_MAP, BITDEPTH_MAP)
+from decoder import dequantize
+from metrics import psnr, max_error, match_size
+
+
+def plain_size(res_idx, depth_idx, packed=True):
+    """Exact file size of an encoding without the entropy stage."""
+    resolution = RESOLUTION_MAP[res_idx]
+    bit_depth = BITDEPTH_MAP[depth_idx]
+    row_bytes = packed_row_bytes(resolution, bit_depth) if packed else resolution
+    return 1 + resolution * row_bytes
+
+
+def evaluate_candidate(reference_img, res_idx, depth_idx, packed=True, entropy=False):
+    """Encode one setting from the shared cropped source and score it."""
+    quantized_data = scale_and_quantize(reference_img, res_idx, depth_idx)
+    encoded = encode_quantized(quantized_data, res_idx, depth_idx, packed, entropy)
+    restored_img = match_size(dequantize(quantized_data, BITDEPTH_MAP[depth_idx]), reference_img)
+    return {
+        "res_idx": res_idx,
+        "depth_idx": depth_idx,
+        "file_bytes": len(encoded),
+        "psnr_db": float(psnr(restored_img, reference_img)),
+        "max_error": max_error(restored_img, reference_img),
+        "encoded": encoded,
+    }
+
+
+def meets_target(result, min_psnr=None, max_err=None):
+    if min_psnr is not None and result["psnr_db"] < min_psnr:
+        return False
+    if max_err is not None and result["max_error"] > max_err:
+        return False
+    return True
+
+
+def find_smallest_encoding(source_path, min_psnr=None, max_err=None, packed=True,
+                           entropy=False, workers=None, target_file=None):
+    """
+    Search the 16 resolution × bit-depth settings for the smallest file
+    that meets a quality target against the center-cropped source.
+
+    The source is decoded and cropped once and every candidate is derived
+    from that square. Candidates are evaluated cheapest-first, in parallel
+    batches of `workers`. After each batch the remaining candidates are
+    pruned:
+    - a setting with lower (or equal) resolution and bit depth than one
+      below min_psnr cannot reach a higher PSNR, so it is skipped. Max error
+      does not always fall as resolution grows, so failing max_err alone
+      prunes nothing
+    - without the entropy stage file sizes are known in advance, so settings
+      no smaller than the best passing file are skipped
+    - with it, settings with higher resolution and bit depth than a passing
+      one are skipped as they only add samples
+
+    Parameters:
+    - source_path: Path to input image
+    - min_psnr: Minimum PSNR in dB (optional)
+    - max_err: Maximum absolute pixel error (optional)
+    - packed, entropy: Payload options, as in encode_image
+    - workers: Parallel evaluations per batch (default: CPU count)
+    - target_file: If given, the winning encoding is written there
+
+    Returns:
+    - best: dict with res_idx, depth_idx, file_bytes, psnr_db, max_error and
+      encoded bytes, or None if no setting meets the target
+    """
+    if min_psnr is None and max_err is None:
+        raise ValueError("Specify min_psnr and/or max_err")
+
+    reference_img = prepare_square_grayscale(source_path)
+    workers = workers or os.cpu_count() or 1
+
+    pending = sorted(((res_idx, depth_idx) for res_idx in RESOLUTION_MAP
+                      for depth_idx in BITDEPTH_MAP),
+                     key=lambda setting: plain_size(*setting, packed))
+    below_psnr = []
+    passed = []
+    best = None
+
+    # OpenCV and NumPy release the GIL, so threads evaluate candidates in
+    # parallel while sharing the single cropped source without copies
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending:
+            batch, pending = pending[:workers], pending[workers:]
+            results = pool.map(lambda setting: evaluate_candidate(
+                reference_img, *setting, packed=packed, entropy=entropy), batch)
+
+            for result in results:
+                setting = (result["res_idx"], result["depth_idx"])
+                if not meets_target(result, min_psnr, max_err):
+                    if min_psnr is not None and result["psnr_db"] < min_psnr:
+                        below_psnr.append(setting)
+                    continue
+                passed.append(setting)
+                if best is None or result["file_bytes"] < best["file_bytes"]:
+                    best = result
+
+            pending = [
+                (res_idx, depth_idx) for res_idx, depth_idx in pending
+                if not any(res_idx <= r and depth_idx <= d for r, d in below_psnr)
+                and not (best is not None and not entropy
+                         and plain_size(res_idx, depth_idx, packed) >= best["file_bytes"])
+                and not (entropy and any(res_idx >= r and depth_idx >= d for r, d in passed))
+            ]
+
+    if best is not None and target_file is not None:
+        with open(target_file, "wb") as output:
+            output.write(best["encoded"])
+    return best
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Find the smallest lab01 encoding meeting a quality target.")
+    parser.add_argument("image", help="Input image path")
+    parser.add_argument("--min-psnr", type=float, default=None, help="Minimum PSNR in dB")
+    parser.add_argument("--max-error", type=int, default=None, help="Maximum absolute pixel error")
+    parser.add_argument("--output", default="encoded_image.bin", help="Where to write the result")
+    parser.add_argument("--entropy", action="store_true", help="Allow the entropy stage")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel evaluations")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    best = find_smallest_encoding(args.image, args.min_psnr, args.max_error,
+                                  entropy=args.entropy, workers=args.workers,
+                                  target_file=args.output)
+    if best is None:
+        print("No setting meets the quality target.")
+        exit(1)
+
+    print(f"[AUTOTUNE] {RESOLUTION_MAP[best['res_idx']]}×{RESOLUTION_MAP[best['res_idx']]}, "
+          f"{BITDEPTH_MAP[best['depth_idx']]}-bit: {best['file_bytes']:,} bytes, "
+          f"PSNR {best['psnr_db']:.2f} dB, max error {best['max_error']}")
+    print(f"[AUTOTUNE] Output written to → {args.output}")
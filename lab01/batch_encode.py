@@ -0,0 +1,191 @@
+import argparse
+import glob
+import os
+import time
+from multiprocessing import Pool
+
+import cv2
+
+from encoder import encode_image, RESOLUTION_MAP, BITDEPTH_MAP
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+GLOB_MAGIC = "*?["
+
+
+def collect_inputs(source):
+    """
+    Resolve a directory or glob pattern to a sorted list of image paths.
+
+    A directory contributes every image file directly inside it; anything
+    else is treated as a glob pattern (e.g. "photos/**/*.jpg").
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)
+                 if name.lower().endswith(IMAGE_EXTENSIONS)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths if os.path.isfile(path))
+
+
+def input_root(source):
+    """
+    Directory that output paths are mirrored from: the source directory
+    itself, or the leading wildcard-free part of a glob pattern.
+    """
+    if os.path.isdir(source):
+        return source
+    parts = []
+    for part in os.path.normpath(source).split(os.sep):
+        if any(char in part for char in GLOB_MAGIC):
+            break
+        parts.append(part)
+    else:
+        parts = parts[:-1]  # a plain file path: its directory is the root
+    if parts == [""]:
+        return os.sep
+    return os.sep.join(parts) or os.curdir
+
+
+def target_path(source_path, root, output_dir):
+    """
+    Output file of one input: its path relative to root, extension kept,
+    plus ".bin" (a/x.jpg → output_dir/a/x.jpg.bin), so inputs never share
+    a target.
+    """
+    relative = os.path.relpath(source_path, root)
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        raise ValueError(f"Input {source_path} lies outside the source root {root}")
+    return os.path.join(output_dir, relative + ".bin")
+
+
+def _init_worker():
+    """Keep OpenCV single-threaded inside each worker to avoid oversubscription."""
+    cv2.setNumThreads(1)
+
+
+def _encode_job(job):
+    """Worker entry point: encode one file and time it."""
+    source_path, target_file, res_idx, depth_idx, packed, entropy = job
+    start = time.perf_counter()
+    try:
+        encode_image(source_path, res_idx, depth_idx, target_file,
+                     packed=packed, entropy=entropy, verbose=False)
+    except Exception as error:
+        return source_path, target_file, 0, 0, time.perf_counter() - start, str(error)
+
+    elapsed = time.perf_counter() - start
+    return (source_path, target_file, os.path.getsize(source_path),
+            os.path.getsize(target_file), elapsed, None)
+
+
+def batch_encode(source, output_dir, res_idx, depth_idx, workers=None,
+                 packed=True, entropy=False, chunksize=8):
+    """
+    Encode every image matched by source with one (res_idx, depth_idx) setting.
+
+    Files are encoded on a process pool and reported as they finish, so
+    results stream to output_dir instead of waiting for the whole batch.
+
+    Parameters:
+    - source: Directory or glob pattern of input images
+    - output_dir: Directory receiving one <relative path>.bin per input,
+      mirroring the inputs' layout below the source directory or glob root
+    - res_idx: Resolution index (0-3)
+    - depth_idx: Bit depth index (0-3)
+    - workers: Number of worker processes (default: CPU count)
+    - packed, entropy: Payload options, as in encode_image
+    - chunksize: Files handed to a worker at a time
+
+    Returns:
+    - summary: dict with counts, byte totals, elapsed time and throughput
+    """
+    if res_idx not in RESOLUTION_MAP or depth_idx not in BITDEPTH_MAP:
+        raise ValueError(f"Invalid setting (res_idx={res_idx}, depth_idx={depth_idx})")
+
+    inputs = collect_inputs(source)
+    root = input_root(source)
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    targets = {}
+    for source_path in inputs:
+        target_file = target_path(source_path, root, output_dir)
+        # Two workers writing one file would silently lose all but one result
+        key = os.path.normcase(os.path.abspath(target_file))
+        if key in targets:
+            raise ValueError(f"{source_path} and {targets[key]} would both be "
+                             f"written to {target_file}")
+        targets[key] = source_path
+        os.makedirs(os.path.dirname(target_file), exist_ok=True)
+        jobs.append((source_path, target_file, res_idx, depth_idx, packed, entropy))
+
+    print(f"[BATCH] {len(jobs)} image(s) → {output_dir} "
+          f"({RESOLUTION_MAP[res_idx]}×{RESOLUTION_MAP[res_idx]}, {BITDEPTH_MAP[depth_idx]}-bit)")
+
+    encoded_count = 0
+    failed_count = 0
+    bytes_in = 0
+    bytes_out = 0
+    start = time.perf_counter()
+
+    with Pool(processes=workers, initializer=_init_worker) as pool:
+        for source_path, target_file, size_in, size_out, elapsed, error in \
+                pool.imap_unordered(_encode_job, jobs, chunksize=chunksize):
+            if error is not None:
+                failed_count += 1
+                print(f"⚠ Skipping {source_path} ({error})")
+                continue
+
+            encoded_count += 1
+            bytes_in += size_in
+            bytes_out += size_out
+            print(f"[BATCH] {source_path} → {target_file}: {size_out:,} bytes, "
+                  f"{elapsed * 1000:.1f} ms, {size_in / elapsed / 1e6:.2f} MB/s")
+
+    total_time = time.perf_counter() - start
+    summary = {
+        "encoded": encoded_count,
+        "failed": failed_count,
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+        "seconds": total_time,
+        "images_per_second": encoded_count / total_time if total_time > 0 else 0.0,
+        "mb_per_second": bytes_in / total_time / 1e6 if total_time > 0 else 0.0,
+    }
+
+    print("\n" + "=" * 60)
+    print("Batch Encoding Complete!")
+    print("-" * 60)
+    print(f"Encoded:      {encoded_count} image(s), {failed_count} failed")
+    print(f"Input Size:   {bytes_in:,} bytes")
+    print(f"Output Size:  {bytes_out:,} bytes")
+    print(f"Elapsed:      {total_time:.2f} s")
+    print(f"Throughput:   {summary['images_per_second']:.1f} images/s, "
+          f"{summary['mb_per_second']:.2f} MB/s")
+    print("=" * 60)
+
+    return summary
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Encode a directory or glob of images in parallel.")
+    parser.add_argument("source", help="Input directory or glob pattern (quote it)")
+    parser.add_argument("output_dir", help="Directory for the encoded .bin files")
+    parser.add_argument("--res", type=int, choices=sorted(RESOLUTION_MAP), required=True,
+                        help="Resolution index: 0=100, 1=200, 2=400, 3=800")
+    parser.add_argument("--depth", type=int, choices=sorted(BITDEPTH_MAP), required=True,
+                        help="Bit depth index: 0=1, 1=2, 2=4, 3=8 bits")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-pack", action="store_true",
+                        help="Store one byte per pixel instead of bit-packing")
+    parser.add_argument("--entropy", action="store_true",
+                        help="Apply the lossless entropy stage")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    batch_encode(args.source, args.output_dir, args.res, args.depth, workers=args.workers,
+                 packed=not args.no_pack, entropy=args.entropy)
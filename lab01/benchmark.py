@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from encoder import (encode_image, prepare_square_grayscale, scale_and_quantize,
+                     choose_decode_flag, RESOLUTION_MAP, BITDEPTH_MAP)
+from decoder import decode_image
+from metrics import psnr, max_error, match_size
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLED_IMAGE = os.path.join(BASE_DIR, "input.jpg")
+DEFAULT_OUTPUT = os.path.join(BASE_DIR, "results", "benchmark.json")
+
+# Lowest PSNR (dB) accepted between a reduced-scale JPEG decode and the full
+# decode of the same target (8-bit output); see REDUCED_DECODE_MARGIN
+REDUCED_DECODE_MIN_PSNR = 38.0
+
+# Size of the synthetic JPEG used to exercise the reduced-scale decode
+REDUCED_TEST_SIZE = (4800, 3300)
+
+
+def make_synthetic_image(width=1600, height=1200, seed=0):
+    """
+    Deterministic grayscale test card: smooth gradients, flat shapes,
+    fine stripes and mild noise, so runs, edges and texture are all present.
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+
+    image = 255 * (0.6 * x / width + 0.4 * y / height)
+    image[(x - width * 0.3) ** 2 + (y - height * 0.4) ** 2 < (height * 0.2) ** 2] = 30
+    image[int(height * 0.55):int(height * 0.9), int(width * 0.55):int(width * 0.9)] = 220
+    stripes = (x > width * 0.05) & (x < width * 0.45) & (y > height * 0.7)
+    image[stripes] = 128 + 100 * np.sign(np.sin(x[stripes] * 0.5))
+    image += rng.normal(0, 4, image.shape)
+
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def latency_stats(samples):
+    """Summarize timings (seconds) as milliseconds."""
+    samples_ms = np.array(samples) * 1000
+    return {
+        "mean_ms": float(samples_ms.mean()),
+        "p50_ms": float(np.percentile(samples_ms, 50)),
+        "p90_ms": float(np.percentile(samples_ms, 90)),
+        "p99_ms": float(np.percentile(samples_ms, 99)),
+        "min_ms": float(samples_ms.min()),
+    }
+
+
+def peak_memory(function):
+    """Peak bytes allocated through Python/NumPy while running function once."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_configuration(source_path, reference_img, res_idx, depth_idx, target_file,
+                            repeats, packed=True, entropy=False):
+    """Time, size and score one (res_idx, depth_idx) setting on one image."""
+    def encode():
+        encode_image(source_path, res_idx, depth_idx, target_file,
+                     packed=packed, entropy=entropy, verbose=False)
+
+    def decode():
+        return decode_image(target_file, verbose=False)
+
+    # Warm up caches once so the first sample is not an outlier
+    encode()
+    decode()
+
+    encode_times = []
+    decode_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        encode()
+        encode_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        restored_img = decode()
+        decode_times.append(time.perf_counter() - start)
+
+    resolution = RESOLUTION_MAP[res_idx]
+    pixels = resolution * resolution
+    encode_stats = latency_stats(encode_times)
+    decode_stats = latency_stats(decode_times)
+    compared = match_size(restored_img, reference_img)
+
+    return {
+        "res_idx": res_idx,
+        "depth_idx": depth_idx,
+        "resolution": resolution,
+        "bit_depth": BITDEPTH_MAP[depth_idx],
+        "file_bytes": os.path.getsize(target_file),
+        "encode": dict(encode_stats,
+                       images_per_s=1000 / encode_stats["p50_ms"],
+                       mpixels_per_s=pixels / 1e3 / encode_stats["p50_ms"],
+                       peak_bytes=peak_memory(encode)),
+        "decode": dict(decode_stats,
+                       images_per_s=1000 / decode_stats["p50_ms"],
+                       mpixels_per_s=pixels / 1e3 / decode_stats["p50_ms"],
+                       peak_bytes=peak_memory(decode)),
+        "psnr_db": float(psnr(compared, reference_img)),
+        "max_error": max_error(compared, reference_img),
+    }
+
+
+def reduced_decode_error(source_path, res_idx):
+    """
+    Compare the reduced-scale decode of one target against the full decode.
+
+    Both go through the real pipeline (crop, INTER_AREA resize) at 8 bits,
+    so the numbers are the extra error that choose_decode_flag introduces.
+
+    Returns:
+    - dict with the reduction factor, PSNR, max error and whether the PSNR
+      meets REDUCED_DECODE_MIN_PSNR, or None if no reduction is used
+    """
+    target = RESOLUTION_MAP[res_idx]
+    flag = choose_decode_flag(source_path, target)
+    if flag == cv2.IMREAD_GRAYSCALE:
+        return None
+
+    depth_idx = max(BITDEPTH_MAP, key=BITDEPTH_MAP.get)
+    reduced = scale_and_quantize(prepare_square_grayscale(source_path, target), res_idx, depth_idx)
+    full = scale_and_quantize(prepare_square_grayscale(source_path), res_idx, depth_idx)
+    reduced_psnr = float(psnr(reduced, full))
+    return {
+        "res_idx": res_idx,
+        "resolution": target,
+        "factor": {cv2.IMREAD_REDUCED_GRAYSCALE_2: 2, cv2.IMREAD_REDUCED_GRAYSCALE_4: 4,
+                   cv2.IMREAD_REDUCED_GRAYSCALE_8: 8}[flag],
+        "psnr_db": reduced_psnr,
+        "max_error": max_error(reduced, full),
+        "within_tolerance": reduced_psnr >= REDUCED_DECODE_MIN_PSNR,
+    }
+
+
+def check_reduced_decode(sources):
+    """
+    Measure reduced_decode_error for every source and target resolution,
+    printing a warning for each result below REDUCED_DECODE_MIN_PSNR.
+    """
+    results = []
+    for name, source_path in sources:
+        for res_idx in sorted(RESOLUTION_MAP):
+            result = reduced_decode_error(source_path, res_idx)
+            if result is None:
+                continue
+            result["image"] = name
+            results.append(result)
+            status = "ok" if result["within_tolerance"] else \
+                f"⚠ below {REDUCED_DECODE_MIN_PSNR} dB"
+            print(f"{name:<12} {result['resolution']:>4}px reduced 1/{result['factor']}  "
+                  f"PSNR vs full decode {result['psnr_db']:6.2f} dB  "
+                  f"max error {result['max_error']:>3}  {status}")
+    return results
+
+
+def run_benchmark(image_paths=None, repeats=20, packed=True, entropy=False,
+                  include_synthetic=True):
+    """
+    Sweep all RESOLUTION_MAP × BITDEPTH_MAP settings over the test images.
+
+    PSNR and max error compare the decoded image, resized back to the
+    center-cropped source square, against that square.
+
+    JPEG sources (plus a large synthetic JPEG) are also checked against
+    the reduced-scale decode tolerance, see check_reduced_decode.
+
+    Returns:
+    - report: JSON-serializable dict (environment, settings, results,
+      reduced_decode)
+    """
+    if image_paths is None:
+        image_paths = [BUNDLED_IMAGE]
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        sources = [(os.path.basename(path), path) for path in image_paths]
+        if include_synthetic:
+            synthetic_path = os.path.join(workdir, "synthetic.png")
+            cv2.imwrite(synthetic_path, make_synthetic_image())
+            sources.insert(0, ("synthetic", synthetic_path))
+
+        target_file = os.path.join(workdir, "encoded.bin")
+        for name, source_path in sources:
+            reference_img = prepare_square_grayscale(source_path)
+            for res_idx in sorted(RESOLUTION_MAP):
+                for depth_idx in sorted(BITDEPTH_MAP):
+                    result = benchmark_configuration(source_path, reference_img, res_idx,
+                                                     depth_idx, target_file, repeats,
+                                                     packed, entropy)
+                    result["image"] = name
+                    results.append(result)
+                    print(f"{name:<12} {result['resolution']:>4}px {result['bit_depth']}-bit  "
+                          f"enc p50 {result['encode']['p50_ms']:7.2f} ms  "
+                          f"dec p50 {result['decode']['p50_ms']:7.2f} ms  "
+                          f"{result['file_bytes']:>8,} B  PSNR {result['psnr_db']:6.2f} dB")
+
+        reduced_sources = list(sources)
+        if include_synthetic:
+            reduced_path = os.path.join(workdir, "synthetic-large.jpg")
+            cv2.imwrite(reduced_path, make_synthetic_image(*REDUCED_TEST_SIZE))
+            reduced_sources.append(("synthetic-large", reduced_path))
+        reduced_results = check_reduced_decode(reduced_sources)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "settings": {"repeats": repeats, "packed": packed, "entropy": entropy,
+                     "reduced_decode_min_psnr": REDUCED_DECODE_MIN_PSNR},
+        "results": results,
+        "reduced_decode": reduced_results,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark every lab01 codec setting.")
+    parser.add_argument("images", nargs="*", help=f"Images to test (default: {BUNDLED_IMAGE})")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per setting")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON report path")
+    parser.add_argument("--no-synthetic", action="store_true", help="Skip the synthetic image")
+    parser.add_argument("--no-pack", action="store_true", help="Benchmark unpacked payloads")
+    parser.add_argument("--entropy", action="store_true", help="Enable the entropy stage")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run_benchmark(args.images or None, repeats=args.repeats, packed=not args.no_pack,
+                           entropy=args.entropy, include_synthetic=not args.no_synthetic)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[BENCHMARK] Report written to → {args.output}")
@@ -0,0 +1,71 @@
+import numpy as np
+
+# Header flag stored in the upper nibble of the header byte.
+# Files written before packing existed keep the upper nibble at zero,
+# so they are still read as one byte per pixel.
+PACKED_FLAG = 0x10
+
+
+def packed_row_bytes(width, bit_depth):
+    """Number of bytes one packed image row occupies."""
+    pixels_per_byte = 8 // bit_depth
+    return (width + pixels_per_byte - 1) // pixels_per_byte
+
+
+def _bit_shifts(bit_depth):
+    """Left shift for each pixel slot inside a byte (first pixel in the high bits)."""
+    pixels_per_byte = 8 // bit_depth
+    return (bit_depth * np.arange(pixels_per_byte - 1, -1, -1)).astype(np.uint8)
+
+
+def pack_pixels(quantized, bit_depth):
+    """
+    Pack quantized levels into 8 // bit_depth pixels per byte.
+
+    Every row is padded to a whole number of bytes so rows stay
+    byte-addressable in the encoded file.
+
+    Parameters:
+    - quantized: 2D uint8 array of levels in [0, 2**bit_depth - 1]
+    - bit_depth: 1, 2, 4 or 8
+
+    Returns:
+    - packed: 2D uint8 array of shape (height, packed_row_bytes)
+    """
+    if bit_depth == 8:
+        return np.ascontiguousarray(quantized, dtype=np.uint8)
+    if bit_depth == 1:
+        return np.packbits(quantized, axis=1)
+
+    height, width = quantized.shape
+    pixels_per_byte = 8 // bit_depth
+    row_bytes = packed_row_bytes(width, bit_depth)
+
+    # Pad each row, group the pixels of every output byte and OR them together
+    padded = np.zeros((height, row_bytes * pixels_per_byte), dtype=np.uint8)
+    padded[:, :width] = quantized
+    groups = padded.reshape(height, row_bytes, pixels_per_byte)
+    return np.bitwise_or.reduce(groups << _bit_shifts(bit_depth), axis=2)
+
+
+def unpack_pixels(packed, bit_depth, height, width):
+    """
+    Inverse of pack_pixels.
+
+    Parameters:
+    - packed: uint8 array holding height packed rows
+    - bit_depth: 1, 2, 4 or 8
+    - height, width: dimensions of the original image
+
+    Returns:
+    - quantized: 2D uint8 array of shape (height, width)
+    """
+    packed = np.asarray(packed, dtype=np.uint8).reshape(height, -1)
+    if bit_depth == 8:
+        return packed[:, :width]
+    if bit_depth == 1:
+        return np.unpackbits(packed, axis=1, count=width)
+
+    mask = (1 << bit_depth) - 1
+    levels = (packed[:, :, np.newaxis] >> _bit_shifts(bit_depth)) & mask
+    return levels.reshape(height, -1)[:, :width]
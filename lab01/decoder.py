@@ -1,19 +1,128 @@
 import cv2
 import numpy as np
 import struct
+import mmap
 import os
 
+from bitpack import unpack_pixels, PACKED_FLAG
+from entropy import entropy_decode, ENTROPY_FLAG
+from pyramid import read_level, PYRAMID_FLAG, TABLE_ENTRY
+
 # Configuration mappings for resolution and bit depth
 RESOLUTION_MAP = {0: 100, 1: 200, 2: 400, 3: 800}
 BITDEPTH_MAP = {0: 1, 1: 2, 2: 4, 3: 8}
 
 
-def decode_image(binary_file):
+def parse_header(header_byte):
+    """Split the header byte into (res_idx, depth_idx, flags)."""
+    res_idx = (header_byte >> 2) & 0b11
+    depth_idx = header_byte & 0b11
+    flags = header_byte & 0xF0
+    return res_idx, depth_idx, flags
+
+
+def decode_payload(header_byte, payload):
+    """
+    Turn an encoded payload back into quantization levels.
+    
+    Parameters:
+    - header_byte: Header byte preceding the payload
+    - payload: Bytes-like pixel data following the header
+    
+    Returns:
+    - quantized_img: 2D uint8 array of quantization levels
+    """
+    res_idx, depth_idx, flags = parse_header(header_byte)
+    if flags not in (0, PACKED_FLAG, ENTROPY_FLAG):
+        raise ValueError(f"Unsupported format flags: {flags:#04x}")
+    
+    resolution = RESOLUTION_MAP[res_idx]
+    bit_depth = BITDEPTH_MAP[depth_idx]
+    
+    if flags & ENTROPY_FLAG:
+        return entropy_decode(payload, resolution, resolution)
+    
+    raw_pixels = np.frombuffer(payload, dtype=np.uint8)
+    if flags & PACKED_FLAG:
+        return unpack_pixels(raw_pixels, bit_depth, resolution, resolution)
+    return raw_pixels.reshape((resolution, resolution))
+
+
+def build_dequantization_lut(bit_depth):
+    """
+    8-bit intensity restored for each quantization level.
+    
+    Uses the same float32 arithmetic as the per-pixel formula, so the table
+    lookup is bit-identical to it. Entries past the last level (only reachable
+    from corrupt data) saturate at 255.
+    """
+    total_levels = 2 ** bit_depth
+    levels = np.minimum(np.arange(256), total_levels - 1).astype(np.float32)
+    return ((levels / (total_levels - 1)) * 255).astype(np.uint8)
+
+
+# One 256-entry lookup table per supported bit depth
+DEQUANTIZATION_LUTS = {bit_depth: build_dequantization_lut(bit_depth)
+                       for bit_depth in BITDEPTH_MAP.values()}
+
+
+def dequantize(quantized_img, bit_depth):
+    """Map quantization levels back to the 0-255 range (one table lookup per pixel)."""
+    return cv2.LUT(np.ascontiguousarray(quantized_img), DEQUANTIZATION_LUTS[bit_depth])
+
+
+def locate_encoding(buffer, res_idx=None, base=0, length=None):
+    """
+    Find the single-image encoding stored in buffer[base:base + length].
+    
+    For a pyramid container this follows the offset table to the requested
+    level (default: the largest); otherwise the whole range is the encoding.
+    
+    Returns:
+    - (header_byte, payload_offset, payload_length), offsets into buffer
+    """
+    if length is None:
+        length = len(buffer) - base
+    
+    header_byte = buffer[base]
+    if header_byte & PYRAMID_FLAG:
+        level = parse_header(header_byte)[0] if res_idx is None else res_idx
+        if level not in RESOLUTION_MAP:
+            raise ValueError(f"Invalid resolution index: {level}")
+        level_offset, length = TABLE_ENTRY.unpack_from(buffer, base + 1 + level * TABLE_ENTRY.size)
+        base += level_offset
+        header_byte = buffer[base]
+    
+    stored_res_idx = parse_header(header_byte)[0]
+    if res_idx is not None and res_idx != stored_res_idx:
+        raise ValueError(f"File holds resolution index {stored_res_idx}, "
+                         f"not {res_idx}")
+    return header_byte, base + 1, length - 1
+
+
+def decode_bytes(encoded, res_idx=None):
+    """
+    Decode an in-memory encoding (bytes, memoryview or mmap slice).
+    
+    Accepts the same layouts as decode_image and returns the same
+    reconstructed image, without printing.
+    """
+    header_byte, payload_offset, payload_length = locate_encoding(encoded, res_idx)
+    payload = memoryview(encoded)[payload_offset:payload_offset + payload_length]
+    quantized_img = decode_payload(header_byte, payload)
+    return dequantize(quantized_img, BITDEPTH_MAP[parse_header(header_byte)[1]])
+
+
+def decode_image(binary_file, res_idx=None, verbose=True):
     """
     Decode binary file and reconstruct image.
     
     Parameters:
     - binary_file: Path to encoded binary file
+    - res_idx: Resolution index to decode from a pyramid container
+      (default: the largest level). Single-image files only accept
+      their own resolution.
+    - verbose: Print the extracted parameters (default True)
     
     Returns:
     - restored_img: Reconstructed image as numpy array
@@ -21,30 +130,180 @@ def decode_image(binary_file):
     with open(binary_file, "rb") as input_stream:
         # Read and parse header
         header_byte = struct.unpack('B', input_stream.read(1))[0]
-        res_idx = (header_byte >> 2) & 0b11
-        depth_idx = header_byte & 0b11
-        
-        # Extract parameters
-        resolution = RESOLUTION_MAP[res_idx]
-        bit_depth = BITDEPTH_MAP[depth_idx]
-        total_levels = 2 ** bit_depth
+        is_pyramid = bool(header_byte & PYRAMID_FLAG)
         
-        # Read pixel data
-        raw_pixels = np.frombuffer(input_stream.read(), dtype=np.uint8)
-        quantized_img = raw_pixels.reshape((resolution, resolution))
+        if is_pyramid:
+            # Seek straight to the requested level via the offset table
+            level = parse_header(header_byte)[0] if res_idx is None else res_idx
+            level_blob = read_level(input_stream, level)
+            header_byte, payload = level_blob[0], level_blob[1:]
+        else:
+            payload = input_stream.read()
+    
+    stored_res_idx, depth_idx, flags = parse_header(header_byte)
+    if res_idx is not None and res_idx != stored_res_idx:
+        raise ValueError(f"File holds resolution index {stored_res_idx}, "
+                         f"not {res_idx}")
+    
+    # Extract parameters
+    resolution = RESOLUTION_MAP[stored_res_idx]
+    bit_depth = BITDEPTH_MAP[depth_idx]
+    total_levels = 2 ** bit_depth
+    
+    # Read pixel data (unpacking or entropy-decoding it as flagged)
+    quantized_img = decode_payload(header_byte, payload)
     
     # Restore to 8-bit range
-    restored_img = (quantized_img.astype(np.float32) / (total_levels - 1)) * 255
-    restored_img = restored_img.astype(np.uint8)
+    restored_img = dequantize(quantized_img, bit_depth)
     
-    print("[DECODE] Parameters extracted:")
-    print(f" Resolution   = {resolution}×{resolution}")
-    print(f" Bit Depth    = {bit_depth} bits")
-    print(f" Gray Levels  = {total_levels}")
+    if verbose:
+        print("[DECODE] Parameters extracted:")
+        print(f" Resolution   = {resolution}×{resolution}")
+        print(f" Bit Depth    = {bit_depth} bits")
+        print(f" Gray Levels  = {total_levels}")
+        print(f" Packed       = {'yes' if flags & PACKED_FLAG else 'no'}")
+        print(f" Entropy      = {'yes' if flags & ENTROPY_FLAG else 'no'}")
+        print(f" Pyramid      = {'yes' if is_pyramid else 'no'}")
     
     return restored_img
 
 
+def _as_slice(key, size):
+    """Normalize an int or slice index to (start, stop, step, keep_axis)."""
+    if isinstance(key, slice):
+        start, stop, step = key.indices(size)
+        if step < 1:
+            raise ValueError("Only forward slices are supported")
+        return start, max(start, stop), step, True
+    
+    index = int(key)
+    if index < 0:
+        index += size
+    if not 0 <= index < size:
+        raise IndexError(f"Index {key} out of range for size {size}")
+    return index, index + 1, 1, False
+
+
+class EncodedImageView:
+    """
+    Lazy, memory-mapped view of an encoded file.
+    
+    Opening the view maps the file and parses the header only. Indexing it
+    with view[rows, cols] (ints or slices) reads and dequantizes just that
+    region, so a crop costs time proportional to the crop, not the file.
+    Raw and bit-packed payloads are addressed in place; entropy-coded
+    payloads are not seekable and are decoded in full on first access.
+    
+    Usage:
+        with EncodedImageView("encoded_image.bin") as view:
+            crop = view[100:200, 50:150]
+    """
+    
+    def __init__(self, binary_file, res_idx=None, offset=0, length=None):
+        self._file = open(binary_file, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._rows = self._payload = None
+        
+        # Locate the single-image encoding (one level of a pyramid, or the
+        # whole range; offset/length select one entry of an archive)
+        try:
+            header_byte, offset, length = locate_encoding(self._mmap, res_idx, offset, length)
+        except ValueError:
+            self.close()
+            raise
+        
+        self.res_idx, self.depth_idx, self.flags = parse_header(header_byte)
+        if self.flags not in (0, PACKED_FLAG, ENTROPY_FLAG):
+            self.close()
+            raise ValueError(f"Unsupported format flags: {self.flags:#04x}")
+        
+        self.resolution = RESOLUTION_MAP[self.res_idx]
+        self.bit_depth = BITDEPTH_MAP[self.depth_idx]
+        
+        # Payload rows, still packed/encoded, straight out of the page cache
+        payload = np.frombuffer(self._mmap, dtype=np.uint8, count=length, offset=offset)
+        if self.flags & ENTROPY_FLAG:
+            self._payload, self._rows = payload, None
+        else:
+            self._payload, self._rows = None, payload.reshape((self.resolution, -1))
+    
+    @property
+    def shape(self):
+        return (self.resolution, self.resolution)
+    
+    def levels(self, rows=slice(None), cols=slice(None)):
+        """Return the quantization levels of a region as a new uint8 array."""
+        row_start, row_stop, row_step, keep_rows = _as_slice(rows, self.resolution)
+        col_start, col_stop, col_step, keep_cols = _as_slice(cols, self.resolution)
+        
+        if self._rows is None:
+            # Entropy-coded: decode once, then serve every region from memory
+            self._rows = entropy_decode(self._payload, self.resolution, self.resolution)
+            self._payload = None
+            self.flags &= ~ENTROPY_FLAG
+        
+        row_block = self._rows[row_start:row_stop:row_step]
+        if row_block.shape[0] == 0 or col_start == col_stop:
+            region = np.zeros((row_block.shape[0], len(range(col_start, col_stop, col_step))),
+                              dtype=np.uint8)
+        elif self.flags & PACKED_FLAG:
+            # Unpack only the bytes that hold the requested columns
+            pixels_per_byte = 8 // self.bit_depth
+            first_byte = col_start // pixels_per_byte
+            last_byte = -(-col_stop // pixels_per_byte)
+            packed = row_block[:, first_byte:last_byte]
+            unpacked = unpack_pixels(packed, self.bit_depth, packed.shape[0],
+                                     packed.shape[1] * pixels_per_byte)
+            skip = first_byte * pixels_per_byte
+            region = unpacked[:, col_start - skip:col_stop - skip:col_step]
+        else:
+            region = row_block[:, col_start:col_stop:col_step]
+        
+        region = np.array(region, dtype=np.uint8)
+        if not keep_cols:
+            region = region[:, 0]
+        if not keep_rows:
+            region = region[0]
+        return region
+    
+    def __getitem__(self, key):
+        """Dequantize a region: view[rows], view[rows, cols]."""
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        rows, cols = key
+        return dequantize(self.levels(rows, cols), self.bit_depth)
+    
+    def close(self):
+        """Release the memory map and the underlying file."""
+        # Drop numpy views first; an mmap cannot close while they exist
+        self._rows = self._payload = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A live traceback still references a region; the map is
+                # unmapped once those references are garbage collected
+                pass
+            self._file.close()
+            self._mmap = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_encoded(binary_file, res_idx=None):
+    """
+    Open an encoded file (or one pyramid level) for region decoding.
+    
+    Returns:
+    - view: EncodedImageView; view[y0:y1, x0:x1] returns a restored crop
+    """
+    return EncodedImageView(binary_file, res_idx)
+
+
 def save_decoded_image(filename, image_data, output_dir="results"):
     """Save decoded image to specified directory."""
     os.makedirs(output_dir, exist_ok=True)
@@ -86,6 +86,7 @@ def run_demo():
     print("Creating 4-bit header:")
     print(f"  - First 2 bits: Spatial resolution index = {resolution_idx}")
     print(f"  - Next 2 bits: Bit depth index = {bitdepth_idx}")
+    print("  - Upper 4 bits: Format flags (bit-packed payload for 1/2/4-bit depths)")
     print("  - Remaining data: Quantized image pixels")
     
     print("\n[STEP 6] SAVING ENCODED FILE")
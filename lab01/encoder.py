@@ -3,34 +3,199 @@ import numpy as np
 import struct
 import os
 
+from bitpack import pack_pixels, PACKED_FLAG
+from entropy import entropy_encode, ENTROPY_FLAG
+from pyramid import build_container, PYRAMID_FLAG
+
 # Configuration mappings for resolution and bit depth
 RESOLUTION_MAP = {0: 100, 1: 200, 2: 400, 3: 800}
 BITDEPTH_MAP = {0: 1, 1: 2, 2: 4, 3: 8}
 
 
-def prepare_square_grayscale(filepath):
-    """Read image and convert to center-cropped grayscale square."""
-    grayscale_img = cv2.imread(filepath, cv2.IMREAD_GRAYSCALE)
-    height, width = grayscale_img.shape
+# OpenCV flags that decode a JPEG at 1/2, 1/4 or 1/8 scale (largest first)
+REDUCED_DECODE_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+]
+
+# A reduced decode must keep at least this many source pixels per target pixel,
+# so the final INTER_AREA resize still averages. With 4 (and the crop aligned
+# to the reduction, see choose_decode_flag) the worst result we measured was
+# 40.0 dB PSNR, max error 12, against a full decode: JPEG-compressed uniform
+# noise and the benchmark test card, 1700-6000 px sources, every target size.
+# With 2 the test card dropped to 26 dB. lab01/benchmark.py re-measures this
+# for its images against REDUCED_DECODE_MIN_PSNR
+REDUCED_DECODE_MARGIN = 4
+
+# JPEG start-of-frame markers (SOF0-SOF15 minus DHT, JPG and DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def read_jpeg_size(filepath):
+    """
+    Read (height, width) from a JPEG header without decoding any pixels.
+    
+    Returns None if the file is not a JPEG, no frame header is found or the
+    file ends early, so the caller falls back to a normal decode.
+    """
+    with open(filepath, "rb") as f:
+        if f.read(2) != b"\xff\xd8":
+            return None
+        
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            # Skip fill bytes between markers
+            while marker[1] == 0xFF:
+                marker = marker[1:] + f.read(1)
+                if len(marker) < 2:
+                    return None
+            if marker[1] in (0x01, *range(0xD0, 0xD8)):
+                continue  # Standalone markers carry no length
+            
+            length_bytes = f.read(2)
+            if len(length_bytes) < 2:
+                return None
+            segment_length = struct.unpack(">H", length_bytes)[0]
+            
+            if marker[1] in JPEG_SOF_MARKERS:
+                frame_header = f.read(5)
+                if len(frame_header) < 5:
+                    return None
+                _, height, width = struct.unpack(">BHH", frame_header)
+                return height, width
+            f.seek(segment_length - 2, os.SEEK_CUR)
+
+
+def choose_decode_flag(filepath, target_size):
+    """
+    Pick the cheapest cv2.imread flag whose output still covers target_size.
+    
+    JPEG decoders can skip most of the inverse DCT work when asked for a
+    1/2, 1/4 or 1/8 scale image. The largest reduction whose center square is
+    still REDUCED_DECODE_MARGIN times target_size is chosen. The center
+    square's size and offset must be multiples of the factor, so the reduced
+    crop covers exactly the same pixels as the full one. Other formats, or
+    sources too small to reduce, use a full-resolution grayscale decode.
+    """
+    if target_size is not None:
+        size = read_jpeg_size(filepath)
+        if size is not None:
+            crop_size = min(size)
+            offset = (max(size) - crop_size) // 2
+            for factor, flag in REDUCED_DECODE_FLAGS:
+                if crop_size % factor or offset % factor:
+                    continue
+                if crop_size // factor >= target_size * REDUCED_DECODE_MARGIN:
+                    return flag
+    return cv2.IMREAD_GRAYSCALE
+
+
+def prepare_square_grayscale(filepath, target_size=None):
+    """
+    Read image and convert to center-cropped grayscale square.
+    
+    When target_size is given, a JPEG source may be decoded at 1/2, 1/4 or
+    1/8 scale (see choose_decode_flag), which cuts decode time and peak
+    memory for small targets.
+    """
+    grayscale_img = cv2.imread(filepath, choose_decode_flag(filepath, target_size))
+    if grayscale_img is None:
+        raise ValueError(f"Could not read image '{filepath}'")
+    return crop_center_square(grayscale_img)
+
+
+def crop_center_square(image_array):
+    """Convert an in-memory image (gray or BGR) to a center-cropped grayscale square."""
+    if image_array.ndim == 3:
+        image_array = cv2.cvtColor(image_array, cv2.COLOR_BGR2GRAY)
+    height, width = image_array.shape
     
     # Calculate square dimensions from shorter side
     crop_size = min(height, width)
     y_offset = (height - crop_size) // 2
     x_offset = (width - crop_size) // 2
     
-    cropped = grayscale_img[y_offset:y_offset+crop_size, x_offset:x_offset+crop_size]
+    cropped = image_array[y_offset:y_offset+crop_size, x_offset:x_offset+crop_size]
     return cropped
 
 
+def build_quantization_lut(bit_depth):
+    """
+    Level assigned to each of the 256 input intensities.
+    
+    Uses the same float32 normalize-and-round as the per-pixel formula, so
+    the table lookup is bit-identical to it.
+    """
+    num_levels = 2 ** bit_depth
+    normalized = np.arange(256, dtype=np.float32) / 255.0
+    return np.round(normalized * (num_levels - 1)).astype(np.uint8)
+
+
+# One 256-entry lookup table per supported bit depth
+QUANTIZATION_LUTS = {bit_depth: build_quantization_lut(bit_depth)
+                     for bit_depth in BITDEPTH_MAP.values()}
+
+
 def apply_quantization(image_array, bit_depth):
     """Reduce intensity levels based on bit depth."""
+    if image_array.dtype == np.uint8:
+        # Single table-lookup pass, no float temporaries
+        return cv2.LUT(image_array, QUANTIZATION_LUTS[bit_depth])
+    
     num_levels = 2 ** bit_depth
     normalized = image_array.astype(np.float32) / 255.0
     quantized = np.round(normalized * (num_levels - 1)).astype(np.uint8)
     return quantized
 
 
-def encode_image(source_path, res_idx, depth_idx, target_file):
+def scale_and_quantize(processed_img, res_idx, depth_idx):
+    """Resize a square grayscale image to RESOLUTION_MAP[res_idx] and quantize it."""
+    target_res = RESOLUTION_MAP[res_idx]
+    scaled_img = cv2.resize(processed_img, (target_res, target_res), 
+                           interpolation=cv2.INTER_AREA)
+    return apply_quantization(scaled_img, BITDEPTH_MAP[depth_idx])
+
+
+def encode_quantized(quantized_data, res_idx, depth_idx, packed=True, entropy=False):
+    """
+    Serialize quantized pixels to the binary format (header byte + payload).
+    
+    Parameters:
+    - quantized_data: 2D uint8 array of quantization levels
+    - res_idx: Resolution index (0-3)
+    - depth_idx: Bit depth index (0-3)
+    - packed: Pack sub-8-bit levels into 8 // bit_depth pixels per byte
+    - entropy: Run-length + Huffman (DEFLATE) code the levels when that
+      gives a smaller payload than the raw/packed layout
+    
+    Returns:
+    - encoded: bytes ready to be written to disk
+    """
+    bit_depth = BITDEPTH_MAP[depth_idx]
+    flags = 0
+    
+    if packed and bit_depth < 8:
+        flags |= PACKED_FLAG
+        payload = pack_pixels(quantized_data, bit_depth).tobytes()
+    else:
+        payload = quantized_data.tobytes()
+    
+    if entropy:
+        compressed = entropy_encode(quantized_data)
+        if len(compressed) < len(payload):
+            flags = ENTROPY_FLAG
+            payload = compressed
+    
+    # Header byte: upper 4 bits format flags, then 2 bits resolution + 2 bits bit depth
+    header_byte = flags | (res_idx << 2) | depth_idx
+    return struct.pack('B', header_byte) + payload
+
+
+def encode_image(source_path, res_idx, depth_idx, target_file, packed=True, entropy=False,
+                 verbose=True):
     """
     Compress and encode image to binary format.
     
@@ -39,27 +204,52 @@ def encode_image(source_path, res_idx, depth_idx, target_file):
     - res_idx: Resolution index (0-3)
     - depth_idx: Bit depth index (0-3)
     - target_file: Output binary file path
+    - packed: Bit-pack the payload for 1/2/4-bit depths (default True)
+    - entropy: Apply the lossless entropy stage (default False)
+    - verbose: Print a line once the file is written (default True)
     """
-    processed_img = prepare_square_grayscale(source_path)
+    processed_img = prepare_square_grayscale(source_path, RESOLUTION_MAP[res_idx])
     
-    # Resize to target resolution
-    target_res = RESOLUTION_MAP[res_idx]
-    scaled_img = cv2.resize(processed_img, (target_res, target_res), 
-                           interpolation=cv2.INTER_AREA)
+    # Resize to target resolution and apply bit depth quantization
+    quantized_data = scale_and_quantize(processed_img, res_idx, depth_idx)
     
-    # Apply bit depth quantization
-    bit_depth = BITDEPTH_MAP[depth_idx]
-    quantized_data = apply_quantization(scaled_img, bit_depth)
+    # Write binary file
+    with open(target_file, "wb") as output:
+        output.write(encode_quantized(quantized_data, res_idx, depth_idx, packed, entropy))
+    
+    if verbose:
+        print(f"[ENCODE] Output written to → {target_file}")
+    return True
+
+
+def encode_pyramid(source_path, depth_idx, target_file, packed=True, entropy=False):
+    """
+    Encode every RESOLUTION_MAP level of an image into one container file.
     
-    # Create header byte (4 bits total: 2 for resolution + 2 for bit depth)
-    header_byte = (res_idx << 2) | depth_idx
+    Each level is encoded exactly as encode_image would encode it; an offset
+    table in the header lets decode_image(target_file, res_idx) read a single
+    level without touching the others.
+    
+    Parameters:
+    - source_path: Path to input image
+    - depth_idx: Bit depth index (0-3) shared by all levels
+    - target_file: Output container file path
+    - packed, entropy: Payload options, as in encode_image
+    """
+    processed_img = prepare_square_grayscale(source_path, max(RESOLUTION_MAP.values()))
+    
+    level_blobs = []
+    for res_idx in sorted(RESOLUTION_MAP):
+        quantized_data = scale_and_quantize(processed_img, res_idx, depth_idx)
+        level_blobs.append(encode_quantized(quantized_data, res_idx, depth_idx, packed, entropy))
+    
+    # Container header advertises the largest level and the shared bit depth
+    header_byte = PYRAMID_FLAG | (max(RESOLUTION_MAP) << 2) | depth_idx
     
-    # Write binary file
     with open(target_file, "wb") as output:
-        output.write(struct.pack('B', header_byte))
-        output.write(quantized_data.tobytes())
+        output.write(build_container(header_byte, level_blobs))
     
-    print(f"[ENCODE] Output written to → {target_file}")
+    print(f"[ENCODE] Pyramid written to → {target_file}")
     return True
 
 
@@ -0,0 +1,73 @@
+import zlib
+
+import numpy as np
+
+# Header flag (upper nibble of the header byte) marking an entropy-coded payload
+ENTROPY_FLAG = 0x20
+
+# Longest run a single RLE length byte can hold
+MAX_RUN = 255
+
+
+def rle_encode(levels):
+    """
+    Run-length encode a quantized image in row-major order.
+
+    Runs longer than MAX_RUN are split so every length fits in one byte.
+
+    Returns:
+    - (values, lengths): two uint8 arrays of equal size
+    """
+    flat = np.ascontiguousarray(levels, dtype=np.uint8).ravel()
+    if flat.size == 0:
+        return flat, flat
+
+    # Start index of every run of identical levels
+    starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1))
+    run_lengths = np.diff(np.append(starts, flat.size))
+
+    # Split long runs into chunks of at most MAX_RUN pixels
+    chunks = (run_lengths + MAX_RUN - 1) // MAX_RUN
+    values = np.repeat(flat[starts], chunks)
+    lengths = np.full(values.size, MAX_RUN, dtype=np.int64)
+    last_chunk = np.cumsum(chunks) - 1
+    lengths[last_chunk] = run_lengths - (chunks - 1) * MAX_RUN
+
+    return values, lengths.astype(np.uint8)
+
+
+def rle_decode(values, lengths):
+    """Expand (values, lengths) runs back into a flat uint8 array."""
+    return np.repeat(values, lengths)
+
+
+def entropy_encode(levels):
+    """
+    Losslessly compress quantized levels.
+
+    The image is run-length encoded, then the run values and run lengths are
+    stored as two planes and compressed with DEFLATE, which applies canonical
+    Huffman coding on top of LZ77 matching.
+
+    Returns:
+    - payload: compressed bytes
+    """
+    values, lengths = rle_encode(levels)
+    return zlib.compress(values.tobytes() + lengths.tobytes())
+
+
+def entropy_decode(payload, height, width):
+    """
+    Inverse of entropy_encode.
+
+    Returns:
+    - levels: 2D uint8 array of shape (height, width)
+    """
+    planes = np.frombuffer(zlib.decompress(payload), dtype=np.uint8)
+    run_count = planes.size // 2
+    levels = rle_decode(planes[:run_count], planes[run_count:])
+
+    if levels.size != height * width:
+        raise ValueError(f"Corrupt entropy payload: expected {height * width} pixels, "
+                         f"got {levels.size}")
+    return levels.reshape((height, width))
@@ -0,0 +1,26 @@
+import cv2
+import numpy as np
+
+
+def mse(img1, img2):
+    return np.mean((img1.astype(np.float32) - img2.astype(np.float32)) ** 2)
+
+
+def psnr(img1, img2):
+    m = mse(img1, img2)
+    if m == 0:
+        return float("inf")
+    return 20 * np.log10(255.0 / np.sqrt(m))
+
+
+def max_error(img1, img2):
+    return int(np.max(np.abs(img1.astype(np.int16) - img2.astype(np.int16))))
+
+
+def match_size(restored_img, reference_img):
+    """Resize a decoded square to the reference square for comparison."""
+    size = reference_img.shape[0]
+    if restored_img.shape[0] == size:
+        return restored_img
+    interpolation = cv2.INTER_AREA if restored_img.shape[0] > size else cv2.INTER_LINEAR
+    return cv2.resize(restored_img, (size, size), interpolation=interpolation)
@@ -0,0 +1,56 @@
+import struct
+
+# Header flag (upper nibble of the header byte) marking a multi-resolution container
+PYRAMID_FLAG = 0x40
+
+# One (offset, length) entry per RESOLUTION_MAP index, little-endian uint32
+LEVEL_COUNT = 4
+TABLE_ENTRY = struct.Struct('<II')
+TABLE_SIZE = LEVEL_COUNT * TABLE_ENTRY.size
+
+
+def build_container(header_byte, level_blobs):
+    """
+    Assemble a pyramid container.
+
+    Layout: [header byte] [offset table] [level 0 blob] ... [level 3 blob]
+    Every level blob is a complete single-image encoding (its own header
+    byte followed by its payload), so it decodes exactly like a .bin file.
+
+    Parameters:
+    - header_byte: Container header byte (must carry PYRAMID_FLAG)
+    - level_blobs: Encoded bytes for resolution indices 0..3, in order
+
+    Returns:
+    - container: bytes ready to be written to disk
+    """
+    if len(level_blobs) != LEVEL_COUNT:
+        raise ValueError(f"Expected {LEVEL_COUNT} levels, got {len(level_blobs)}")
+
+    offset = 1 + TABLE_SIZE
+    table = bytearray()
+    for blob in level_blobs:
+        table += TABLE_ENTRY.pack(offset, len(blob))
+        offset += len(blob)
+
+    return struct.pack('B', header_byte) + bytes(table) + b''.join(level_blobs)
+
+
+def read_level(input_stream, res_idx):
+    """
+    Read the encoded blob of one level without touching the others.
+
+    Parameters:
+    - input_stream: Binary file object opened on a pyramid container
+    - res_idx: Resolution index of the level to read (0-3)
+
+    Returns:
+    - blob: bytes of that level (header byte + payload)
+    """
+    if not 0 <= res_idx < LEVEL_COUNT:
+        raise ValueError(f"Invalid resolution index: {res_idx}")
+
+    input_stream.seek(1 + res_idx * TABLE_ENTRY.size)
+    offset, length = TABLE_ENTRY.unpack(input_stream.read(TABLE_ENTRY.size))
+    input_stream.seek(offset)
+    return input_stream.read(length)
@@ -0,0 +1,189 @@
+import struct
+
+import numpy as np
+
+from encoder import (prepare_square_grayscale, crop_center_square, scale_and_quantize,
+                     encode_quantized, RESOLUTION_MAP, BITDEPTH_MAP)
+from decoder import locate_encoding, decode_payload, dequantize, parse_header
+
+# File layout:
+#   [SEQUENCE_HEADER] [frame record] ... [frame record] [keyframe index] [footer]
+# Frame record: type (KEYFRAME/DELTA), blob length, blob. Every blob is a
+# regular single-image encoding; a delta blob holds (frame - previous) mod
+# 2**bit_depth as its levels, so static areas become long runs of zeros.
+SEQUENCE_MAGIC = b"L1SQ"
+FOOTER_MAGIC = b"L1SX"
+KEYFRAME = 0x4B
+DELTA = 0x44
+SEQUENCE_HEADER = struct.Struct('<4sBH')   # magic, header byte, keyframe interval
+RECORD = struct.Struct('<BI')              # frame type, blob length
+KEYFRAME_ENTRY = struct.Struct('<IQ')      # frame number, record offset
+FOOTER = struct.Struct('<QII4s')           # index offset, frame count, keyframe count, magic
+
+
+def _blob_levels(blob):
+    """Quantization levels stored in one single-image encoding."""
+    header_byte, offset, length = locate_encoding(blob)
+    return decode_payload(header_byte, memoryview(blob)[offset:offset + length])
+
+
+class SequenceWriter:
+    """
+    Write a frame sequence as keyframes plus modular deltas.
+
+    Every keyframe_interval-th frame is stored as a normal encoding; the
+    others store their difference to the previous reconstructed frame,
+    entropy coded. With delta_threshold > 0, level changes of at most that
+    size are dropped; because deltas are taken against the reconstruction,
+    the error never accumulates beyond the threshold.
+
+    Usage:
+        with SequenceWriter("clip.seq", res_idx=2, depth_idx=2) as writer:
+            for frame in frames:
+                writer.add_frame(frame)
+    """
+
+    def __init__(self, target_file, res_idx, depth_idx, keyframe_interval=30,
+                 delta_threshold=0, packed=True, entropy=True):
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+        self.res_idx = res_idx
+        self.depth_idx = depth_idx
+        self.keyframe_interval = keyframe_interval
+        self.delta_threshold = delta_threshold
+        self.packed = packed
+        self.entropy = entropy
+        self.frame_count = 0
+        self._mask = 2 ** BITDEPTH_MAP[depth_idx] - 1
+        self._previous = None
+        self._keyframes = []
+
+        self._file = open(target_file, "wb")
+        header_byte = (res_idx << 2) | depth_idx
+        self._file.write(SEQUENCE_HEADER.pack(SEQUENCE_MAGIC, header_byte, keyframe_interval))
+
+    def add_frame(self, frame):
+        """Append one frame, given as an image path or a gray/BGR numpy array."""
+        if isinstance(frame, str):
+            square = prepare_square_grayscale(frame, RESOLUTION_MAP[self.res_idx])
+        else:
+            square = crop_center_square(frame)
+        levels = scale_and_quantize(square, self.res_idx, self.depth_idx)
+
+        if self.frame_count % self.keyframe_interval == 0:
+            frame_type = KEYFRAME
+            blob = encode_quantized(levels, self.res_idx, self.depth_idx, self.packed, self.entropy)
+            self._keyframes.append((self.frame_count, self._file.tell()))
+        else:
+            frame_type = DELTA
+            if self.delta_threshold > 0:
+                change = np.abs(levels.astype(np.int16) - self._previous.astype(np.int16))
+                levels = np.where(change <= self.delta_threshold, self._previous, levels)
+            # uint8 subtraction wraps mod 256; the mask reduces it mod 2**bit_depth
+            delta = (levels - self._previous) & self._mask
+            blob = encode_quantized(delta, self.res_idx, self.depth_idx, self.packed, entropy=True)
+
+        self._file.write(RECORD.pack(frame_type, len(blob)))
+        self._file.write(blob)
+        self._previous = levels
+        self.frame_count += 1
+
+    def close(self):
+        """Write the keyframe index and footer and close the file."""
+        if self._file is None:
+            return
+        index_offset = self._file.tell()
+        for entry in self._keyframes:
+            self._file.write(KEYFRAME_ENTRY.pack(*entry))
+        self._file.write(FOOTER.pack(index_offset, self.frame_count,
+                                     len(self._keyframes), FOOTER_MAGIC))
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def encode_sequence(frames, target_file, res_idx, depth_idx, **options):
+    """
+    Encode an iterable of frames (paths or arrays) into one sequence file.
+
+    Options are passed to SequenceWriter. Returns the number of frames written.
+    """
+    with SequenceWriter(target_file, res_idx, depth_idx, **options) as writer:
+        for frame in frames:
+            writer.add_frame(frame)
+    print(f"[ENCODE] {writer.frame_count} frame(s) written to → {target_file}")
+    return writer.frame_count
+
+
+def _read_sequence_info(input_stream):
+    magic, header_byte, keyframe_interval = SEQUENCE_HEADER.unpack(
+        input_stream.read(SEQUENCE_HEADER.size))
+    if magic != SEQUENCE_MAGIC:
+        raise ValueError("Not a lab01 sequence file")
+
+    input_stream.seek(-FOOTER.size, 2)
+    index_offset, frame_count, keyframe_count, footer_magic = FOOTER.unpack(
+        input_stream.read(FOOTER.size))
+    if footer_magic != FOOTER_MAGIC:
+        raise ValueError("Sequence footer is missing or corrupt")
+
+    input_stream.seek(index_offset)
+    keyframes = [KEYFRAME_ENTRY.unpack(input_stream.read(KEYFRAME_ENTRY.size))
+                 for _ in range(keyframe_count)]
+
+    res_idx, depth_idx, _ = parse_header(header_byte)
+    return {
+        "res_idx": res_idx,
+        "depth_idx": depth_idx,
+        "keyframe_interval": keyframe_interval,
+        "frame_count": frame_count,
+        "keyframes": keyframes,
+    }
+
+
+def read_sequence_info(binary_file):
+    """Resolution, bit depth, frame count and keyframe index of a sequence file."""
+    with open(binary_file, "rb") as input_stream:
+        return _read_sequence_info(input_stream)
+
+
+def decode_sequence(binary_file, start=0):
+    """
+    Stream the reconstructed frames of a sequence file.
+
+    Seeks to the last keyframe at or before `start` and decodes forward,
+    yielding frames start, start + 1, ... Only one record and the reference
+    frame are held in memory at a time.
+
+    Yields:
+    - restored_img: 2D uint8 array per frame
+    """
+    with open(binary_file, "rb") as input_stream:
+        info = _read_sequence_info(input_stream)
+        bit_depth = BITDEPTH_MAP[info["depth_idx"]]
+        mask = 2 ** bit_depth - 1
+
+        seek_points = [entry for entry in info["keyframes"] if entry[0] <= start]
+        if not seek_points or start >= info["frame_count"]:
+            return
+        frame_number, offset = seek_points[-1]
+        input_stream.seek(offset)
+
+        previous = None
+        while frame_number < info["frame_count"]:
+            frame_type, length = RECORD.unpack(input_stream.read(RECORD.size))
+            levels = _blob_levels(input_stream.read(length))
+            if frame_type == DELTA:
+                levels = (previous + levels) & mask
+            elif frame_type != KEYFRAME:
+                raise ValueError(f"Unknown frame type {frame_type:#04x} at frame {frame_number}")
+
+            previous = levels
+            if frame_number >= start:
+                yield dequantize(levels, bit_depth)
+            frame_number += 1
@@ -3,6 +3,10 @@ Affine Matrix Module
 Implements matrix operations for affine transformations without using numpy
 """
 
+# Determinants smaller than this are treated as singular (not invertible)
+SINGULAR_TOLERANCE = 1e-12
+
+
 def matrix_multiply_3x3(matrix1, matrix2):
     """
     Multiply two 3x3 matrices
@@ -117,6 +121,32 @@ def combine_transformations(matrices):
     return result
 
 
+def invert_affine_matrix(matrix):
+    """
+    Invert a 3x3 affine transformation matrix (last row [0, 0, 1])
+    Raises ValueError if the linear part is singular
+    Returns: inverse 3x3 matrix
+    """
+    a, b, tx = matrix[0]
+    c, d, ty = matrix[1]
+    
+    det = a * d - b * c
+    if abs(det) < SINGULAR_TOLERANCE:
+        raise ValueError(f"Matrix is singular (determinant {det})")
+    
+    # Inverse of the linear part, then the translation mapped back through it
+    inv_a = d / det
+    inv_b = -b / det
+    inv_c = -c / det
+    inv_d = a / det
+    
+    return [
+        [inv_a, inv_b, -(inv_a * tx + inv_b * ty)],
+        [inv_c, inv_d, -(inv_c * tx + inv_d * ty)],
+        [0, 0, 1]
+    ]
+
+
 def print_matrix(matrix, name="Matrix"):
     """
     Print a matrix in a readable format
@@ -0,0 +1,300 @@
+"""
+Benchmark Module
+Times the lab02 transformation engines and compares their output
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import time
+
+from image_buffer import ImageBuffer
+from image_reader import read_bmp_image
+from kernels import INTERPOLATIONS
+from mipmap import MIPMAP_MODES, ImagePyramid
+from rotate import apply_rotation, ROTATION_METHODS
+from scale import apply_scaling
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLED_IMAGE = os.path.join(BASE_DIR, "image.bmp")
+
+
+def make_synthetic_image(width=1024, height=768):
+    """
+    Deterministic test card: colour gradients, a disc, fine stripes and a
+    checkerboard, so smooth areas, edges and high frequencies are present
+    """
+    image = ImageBuffer(width, height)
+    data = image.data
+    i = 0
+    for y in range(height):
+        for x in range(width):
+            b = 255 * x // max(1, width - 1)
+            g = 255 * y // max(1, height - 1)
+            r = 128
+            if (x - width * 0.3) ** 2 + (y - height * 0.4) ** 2 < (height * 0.2) ** 2:
+                b, g, r = 30, 60, 220
+            elif x > width * 0.6 and y > height * 0.6:
+                b = g = r = 255 if (x // 8 + y // 8) % 2 else 0
+            elif y > height * 0.75 and x % 4 < 2:
+                b = g = r = 240
+            data[i:i + 3] = bytes((b, g, r))
+            i += 3
+    return image
+
+
+def interior_mask(width, height, angle_degrees, new_width, new_height):
+    """
+    Per-value mask of a rotated canvas: True where the source position lies
+    at least one pixel inside the image
+
+    The engines treat the outermost pixel differently (the bilinear warp
+    extrapolates, the shear passes fade to black), so agreement is also
+    reported away from that border.
+    """
+    angle_rad = -angle_degrees * math.pi / 180.0
+    cos_a = math.cos(angle_rad)
+    sin_a = math.sin(angle_rad)
+    mask = []
+    for y in range(new_height):
+        dy = y - new_height / 2.0
+        for x in range(new_width):
+            dx = x - new_width / 2.0
+            src_x = cos_a * dx - sin_a * dy + width / 2.0
+            src_y = sin_a * dx + cos_a * dy + height / 2.0
+            inside = 1 <= src_x <= width - 2 and 1 <= src_y <= height - 2
+            mask.extend((inside, inside, inside))
+    return mask
+
+
+def compare_images(image, reference, mask=None):
+    """
+    PSNR (dB) and maximum absolute difference between two ImageBuffers,
+    optionally restricted to the values where mask is True
+    """
+    if (image.width, image.height) != (reference.width, reference.height):
+        raise ValueError(f"Cannot compare {image!r} with {reference!r}")
+    if mask is None:
+        pairs = zip(image.data, reference.data)
+    else:
+        pairs = (pair for pair, keep in zip(zip(image.data, reference.data), mask) if keep)
+    squared = 0
+    worst = 0
+    count = 0
+    for a, b in pairs:
+        diff = a - b if a > b else b - a
+        count += 1
+        squared += diff * diff
+        if diff > worst:
+            worst = diff
+    mse = squared / max(1, count)
+    psnr = float('inf') if mse == 0 else 10 * math.log10(255 * 255 / mse)
+    return psnr, worst
+
+
+def json_number(value):
+    """value for the JSON report: None for inf or NaN, which JSON cannot hold"""
+    return value if math.isfinite(value) else None
+
+
+def time_call(function, repeats):
+    """Run function repeats times; returns (best seconds, mean seconds, last result)"""
+    samples = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - start)
+    return min(samples), sum(samples) / len(samples), result
+
+
+def benchmark_rotation(name, image, angles, repeats, workers=1):
+    """
+    Time every rotation method on one image and compare each against the
+    bilinear backward mapping, over the whole canvas and away from the border
+    """
+    results = []
+    for angle in angles:
+        reference = None
+        mask = None
+        for method in ROTATION_METHODS:
+            best, mean, (new_width, new_height, output) = time_call(
+                lambda: apply_rotation(image, image.width, image.height, angle, method, workers),
+                repeats)
+            if reference is None:
+                reference = output
+                mask = interior_mask(image.width, image.height, angle, new_width, new_height)
+            psnr, worst = compare_images(output, reference)
+            interior_psnr, interior_worst = compare_images(output, reference, mask)
+            results.append({
+                "benchmark": "rotation_method",
+                "image": name,
+                "angle": angle,
+                "method": method,
+                "output_size": [new_width, new_height],
+                "best_ms": best * 1000,
+                "mean_ms": mean * 1000,
+                "mpixels_per_s": new_width * new_height / best / 1e6,
+                "psnr_vs_bilinear_db": json_number(psnr),
+                "max_diff_vs_bilinear": worst,
+                "interior_psnr_vs_bilinear_db": json_number(interior_psnr),
+                "interior_max_diff_vs_bilinear": interior_worst,
+            })
+            print(f"{name:<10} {angle:>7.1f}°  {method:<12} {best * 1000:9.1f} ms  "
+                  f"{new_width * new_height / best / 1e6:7.2f} MP/s  "
+                  f"PSNR vs bilinear {psnr:6.2f} dB (interior {interior_psnr:6.2f} dB)  "
+                  f"max diff {worst} (interior {interior_worst})")
+    return results
+
+
+def interpolation_modes():
+    """(label, interpolation, fixed_point) for every kernel, fastest first"""
+    modes = []
+    for interpolation in INTERPOLATIONS:
+        modes.append((interpolation, interpolation, False))
+        if interpolation == "bilinear":
+            modes.append(("bilinear-fixed", interpolation, True))
+    return modes
+
+
+def benchmark_interpolation(name, image, angles, scale, repeats, workers=1):
+    """
+    Throughput of every interpolation kernel on rotations and one scaling,
+    with agreement against float bilinear as a rough quality gap
+    """
+    width, height = image.width, image.height
+    cases = [(f"rotate {angle:g}°", lambda mode, angle=angle: apply_rotation(
+        image, width, height, angle, workers=workers, fixed_point=mode[2], interpolation=mode[1]))
+        for angle in angles]
+    cases.append((f"scale {scale:g}x", lambda mode: apply_scaling(
+        image, width, height, scale, scale, workers, fixed_point=mode[2], interpolation=mode[1])))
+
+    results = []
+    for case, transform in cases:
+        reference = transform(("bilinear", "bilinear", False))[2]
+        for mode in interpolation_modes():
+            best, mean, (new_width, new_height, output) = time_call(lambda: transform(mode), repeats)
+            psnr, worst = compare_images(output, reference)
+            results.append({
+                "benchmark": "interpolation",
+                "image": name,
+                "case": case,
+                "interpolation": mode[0],
+                "output_size": [new_width, new_height],
+                "best_ms": best * 1000,
+                "mean_ms": mean * 1000,
+                "mpixels_per_s": new_width * new_height / best / 1e6,
+                "psnr_vs_bilinear_db": json_number(psnr),
+                "max_diff_vs_bilinear": worst,
+            })
+            print(f"{name:<10} {case:<12} {mode[0]:<15} {best * 1000:9.1f} ms  "
+                  f"{new_width * new_height / best / 1e6:7.2f} MP/s  "
+                  f"PSNR vs bilinear {psnr:6.2f} dB  max diff {worst}")
+    return results
+
+
+def benchmark_mipmap(name, image, scales, repeats):
+    """
+    Downscaling with every mipmap mode: a plain call (which builds the
+    levels it needs) and the best call through an ImagePyramid whose
+    levels are already built
+    """
+    width, height = image.width, image.height
+    results = []
+    for scale in scales:
+        for mode in MIPMAP_MODES:
+            plain, _, _ = time_call(
+                lambda: apply_scaling(image, width, height, scale, scale, mipmap=mode), repeats)
+            pyramid = ImagePyramid(image, width, height)
+            apply_scaling(pyramid, width, height, scale, scale, mipmap=mode)
+            best, mean, (new_width, new_height, _) = time_call(
+                lambda: apply_scaling(pyramid, width, height, scale, scale, mipmap=mode), repeats)
+            results.append({
+                "benchmark": "mipmap",
+                "image": name,
+                "scale": scale,
+                "mipmap": mode,
+                "output_size": [new_width, new_height],
+                "plain_ms": plain * 1000,
+                "best_ms": best * 1000,
+                "mean_ms": mean * 1000,
+            })
+            print(f"{name:<10} scale {scale:<6g} {mode:<10} plain {plain * 1000:9.1f} ms  "
+                  f"built pyramid {best * 1000:9.1f} ms")
+    return results
+
+
+def run_benchmark(image_paths=None, angles=(5.0, 30.0, 45.0, 135.0), repeats=3,
+                  include_synthetic=True, workers=1, scale=1.5, downscales=(0.5, 0.3, 0.1)):
+    """
+    Benchmark the rotation methods, the interpolation kernels and the
+    mipmap modes on the given BMP files (default: the bundled image) and a
+    synthetic test card
+
+    Returns:
+        report: JSON-serializable dict (environment, settings, results)
+    """
+    if image_paths is None:
+        image_paths = [BUNDLED_IMAGE]
+
+    sources = [(os.path.basename(path), read_bmp_image(path)[2]) for path in image_paths]
+    if include_synthetic:
+        sources.insert(0, ("synthetic", make_synthetic_image()))
+
+    results = []
+    for name, image in sources:
+        results.extend(benchmark_rotation(name, image, angles, repeats, workers))
+    for name, image in sources:
+        results.extend(benchmark_interpolation(name, image, angles, scale, repeats, workers))
+    for name, image in sources:
+        results.extend(benchmark_mipmap(name, image, downscales, repeats))
+
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": numpy_version,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "settings": {"angles": list(angles), "scale": scale,
+                     "downscales": list(downscales), "repeats": repeats, "workers": workers},
+        "results": results,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the lab02 transformation engines.")
+    parser.add_argument("images", nargs="*", help=f"BMP files to test (default: {BUNDLED_IMAGE})")
+    parser.add_argument("--angles", type=float, nargs="+", default=[5.0, 30.0, 45.0, 135.0],
+                        help="Rotation angles in degrees")
+    parser.add_argument("--scale", type=float, default=1.5,
+                        help="Scaling factor of the interpolation benchmark")
+    parser.add_argument("--downscales", type=float, nargs="+", default=[0.5, 0.3, 0.1],
+                        help="Scaling factors of the mipmap benchmark")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per setting")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes for the bilinear warp (see warp_affine)")
+    parser.add_argument("--no-synthetic", action="store_true", help="Skip the synthetic image")
+    parser.add_argument("--output", default=None, help="Optional JSON report path")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run_benchmark(args.images or None, angles=args.angles, repeats=args.repeats,
+                           include_synthetic=not args.no_synthetic, workers=args.workers,
+                           scale=args.scale, downscales=args.downscales)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, allow_nan=False)
+        print(f"\n[BENCHMARK] Report written to → {args.output}")
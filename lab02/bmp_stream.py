@@ -0,0 +1,111 @@
+"""
+BMP Stream Module
+Reads and writes BMP files in row bands without loading whole images
+"""
+
+import mmap
+import os
+
+from image_buffer import ImageBuffer
+from image_reader import read_bmp_header
+from image_writer import build_bmp_header
+
+
+class BmpSource:
+    """
+    Memory-mapped 24-bit BMP file that hands out regions on demand
+
+    Only the pages holding the requested rows are read from disk, so
+    images larger than memory can be processed band by band.
+    """
+
+    def __init__(self, filename):
+        self._file = open(filename, 'rb')
+        try:
+            (self.width, self.height, self._offset,
+             self._row_size, self._bottom_up) = read_bmp_header(self._file)
+            if os.fstat(self._file.fileno()).st_size < self._offset + self._row_size * self.height:
+                raise ValueError("BMP pixel data is truncated")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+
+    def read_window(self, x, y, width, height):
+        """
+        Copy a rectangle of the image, handling bottom-up storage and row padding
+        Returns: ImageBuffer of width x height pixels, top row first
+        """
+        if x < 0 or y < 0 or width < 0 or height < 0 or \
+                x + width > self.width or y + height > self.height:
+            raise ValueError(f"Window {width} x {height} at ({x}, {y}) is outside the "
+                             f"{self.width} x {self.height} image")
+
+        start = x * 3
+        stop = (x + width) * 3
+        rows = []
+        for row in range(y, y + height):
+            file_row = self.height - 1 - row if self._bottom_up else row
+            offset = self._offset + file_row * self._row_size
+            rows.append(self._map[offset + start:offset + stop])
+        return ImageBuffer(width, height, bytearray().join(rows))
+
+    def read_rows(self, start, stop):
+        """Copy rows start to stop - 1 as an ImageBuffer"""
+        return self.read_window(0, start, self.width, stop - start)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BmpSink:
+    """
+    24-bit BMP file written as its rows are produced
+
+    Rows arrive top row first, so the file is stored top-down (a negative
+    height in the header, as the format allows) and can be appended to. The
+    header is written without rows and patched with the final row count
+    when the sink is closed.
+    """
+
+    def __init__(self, filename, width):
+        self.width = width
+        self.height = 0
+        self._padding = bytes(((width * 3 + 3) // 4) * 4 - width * 3)
+        self._file = open(filename, 'wb')
+        self._file.write(build_bmp_header(width, 0, top_down=True))
+
+    def write_rows(self, image):
+        """Append the rows of an ImageBuffer as wide as the sink"""
+        if image.width != self.width:
+            raise ValueError(f"Expected rows {self.width} pixels wide, got {image!r}")
+        if self._padding:
+            block = bytearray()
+            for y in range(image.height):
+                block += image.row(y)
+                block += self._padding
+            self._file.write(block)
+        else:
+            self._file.write(image.data)
+        self.height += image.height
+
+    def close(self):
+        """Patch the header with the rows written and close the file"""
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(build_bmp_header(self.width, self.height, top_down=True))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,116 @@
+"""
+Image Buffer Module
+Compact byte-array image storage without using built-in image processing libraries
+"""
+
+BLACK = (0, 0, 0)
+
+
+class ImageBuffer:
+    """
+    24-bit image stored in a single bytearray
+
+    Pixels are kept as consecutive B, G, R bytes, top row first, with no
+    row padding, so an image costs exactly 3 bytes per pixel (a 12 MP
+    image takes 36 MB instead of gigabytes of nested lists).
+    """
+
+    __slots__ = ('width', 'height', 'data')
+
+    def __init__(self, width, height, data=None):
+        """
+        Args:
+            width, height: image dimensions
+            data: optional bytes-like pixel data of width * height * 3 bytes
+                  (a bytearray or a memoryview, e.g. of shared memory, is
+                  used as is, anything else is copied)
+        """
+        size = width * height * 3
+        if data is None:
+            data = bytearray(size)
+        elif not isinstance(data, (bytearray, memoryview)):
+            data = bytearray(data)
+        if len(data) != size:
+            raise ValueError(f"Expected {size} bytes for a {width} x {height} image, "
+                             f"got {len(data)}")
+
+        self.width = width
+        self.height = height
+        self.data = data
+
+    @classmethod
+    def from_pixel_data(cls, pixel_data, width, height):
+        """
+        Create an image buffer from a 2D list of [B, G, R] values
+        Values are clamped to 0-255
+        """
+        image = cls(width, height)
+        for y in range(height):
+            row = pixel_data[y]
+            values = [value for x in range(width) for value in row[x][:3]]
+            try:
+                image.row(y)[:] = bytes(values)
+            except (TypeError, ValueError):
+                image.row(y)[:] = bytes([max(0, min(255, int(v))) for v in values])
+        return image
+
+    @classmethod
+    def from_array(cls, image):
+        """Create an image buffer from a height x width x 3 uint8 NumPy array"""
+        height, width = image.shape[:2]
+        return cls(width, height, image.tobytes())
+
+    def to_pixel_data(self):
+        """
+        Convert to a 2D list of [B, G, R] values
+        """
+        data = self.data
+        row_bytes = self.width * 3
+        pixel_data = []
+        for y in range(self.height):
+            values = iter(data[y * row_bytes:(y + 1) * row_bytes])
+            pixel_data.append([[b, g, r] for b, g, r in zip(values, values, values)])
+        return pixel_data
+
+    def to_array(self):
+        """
+        View the pixels as a height x width x 3 uint8 NumPy array
+        The array shares memory with this buffer (no copy is made)
+        """
+        import numpy as np
+        return np.frombuffer(self.data, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def copy(self):
+        return ImageBuffer(self.width, self.height, bytearray(self.data))
+
+    def row(self, y):
+        """
+        Writable view of row y as width * 3 bytes
+        """
+        row_bytes = self.width * 3
+        return memoryview(self.data)[y * row_bytes:(y + 1) * row_bytes]
+
+    def get_pixel(self, x, y):
+        """
+        Get pixel value at (x, y) with boundary checking
+        Returns (B, G, R) or (0, 0, 0) if out of bounds
+        """
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return BLACK
+        i = (y * self.width + x) * 3
+        return self.data[i], self.data[i + 1], self.data[i + 2]
+
+    def set_pixel(self, x, y, bgr):
+        """
+        Set pixel (x, y) to [B, G, R], clamping each value to 0-255
+        """
+        i = (y * self.width + x) * 3
+        self.data[i:i + 3] = bytes([max(0, min(255, int(v))) for v in bgr])
+
+    def __eq__(self, other):
+        if not isinstance(other, ImageBuffer):
+            return NotImplemented
+        return (self.width, self.height, self.data) == (other.width, other.height, other.data)
+
+    def __repr__(self):
+        return f"ImageBuffer({self.width} x {self.height})"
@@ -3,67 +3,143 @@ Image Reader Module
 Reads BMP image files without using built-in image processing libraries
 """
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: read_bmp falls back to pure Python
+    np = None
+
+from image_buffer import ImageBuffer
+
+
+def read_bmp_header(f):
+    """
+    Parse the BMP and DIB headers of an open BMP file
+    Returns: (width, height, pixel_data_offset, row_size, bottom_up)
+    """
+    # Read BMP Header (14 bytes)
+    bmp_header = f.read(14)
+
+    # Check if file is BMP
+    if bmp_header[0:2] != b'BM':
+        raise ValueError("Not a valid BMP file")
+
+    # Get pixel data offset
+    pixel_data_offset = int.from_bytes(bmp_header[10:14], byteorder='little')
+
+    # Read the common part of the DIB header (40 bytes for BITMAPINFOHEADER)
+    dib_header = f.read(40)
+
+    # Extract image dimensions (a negative height marks a top-down image)
+    width = int.from_bytes(dib_header[4:8], byteorder='little')
+    height = int.from_bytes(dib_header[8:12], byteorder='little', signed=True)
+    bits_per_pixel = int.from_bytes(dib_header[14:16], byteorder='little')
+
+    # Only support 24-bit BMP
+    if bits_per_pixel != 24:
+        raise ValueError(f"Only 24-bit BMP supported, got {bits_per_pixel}-bit")
+
+    # Calculate row size (must be multiple of 4 bytes)
+    row_size = ((width * 3 + 3) // 4) * 4
+
+    return width, abs(height), pixel_data_offset, row_size, height > 0
+
+
+def _read_pixel_block(filename):
+    """
+    Read the whole pixel region of a BMP file in one call
+    Returns: (width, height, row_size, bottom_up, data)
+    """
+    with open(filename, 'rb') as f:
+        width, height, pixel_data_offset, row_size, bottom_up = read_bmp_header(f)
+        f.seek(pixel_data_offset)
+        data = f.read(row_size * height)
+
+    if len(data) < row_size * height:
+        raise ValueError("BMP pixel data is truncated")
+    return width, height, row_size, bottom_up, data
+
+
+def read_bmp_array(filename):
+    """
+    Reads a BMP file into a NumPy array
+    Returns: (width, height, image)
+    image is a contiguous height x width x 3 uint8 array in [B, G, R] order,
+    top row first
+    """
+    if np is None:
+        raise ImportError("read_bmp_array requires NumPy; use read_bmp instead")
+
+    width, height, row_size, bottom_up, data = _read_pixel_block(filename)
+
+    # View the block as padded rows, drop the padding and flip bottom-up
+    # storage with strided views; only the final copy touches the pixels
+    rows = np.frombuffer(data, dtype=np.uint8).reshape(height, row_size)[:, :width * 3]
+    if bottom_up:
+        rows = rows[::-1]
+
+    return width, height, np.ascontiguousarray(rows).reshape(height, width, 3)
+
+
+def array_to_pixel_data(image):
+    """
+    Convert a height x width x 3 array to the 2D list of [B, G, R] values
+    used by the transformation modules
+    """
+    return image.tolist()
+
+
 def read_bmp(filename):
     """
     Reads a BMP file and returns image data
     Returns: (width, height, pixel_data)
     pixel_data is a 2D list where each element is [B, G, R]
     """
-    with open(filename, 'rb') as f:
-        # Read BMP Header (14 bytes)
-        bmp_header = f.read(14)
-        
-        # Check if file is BMP
-        if bmp_header[0:2] != b'BM':
-            raise ValueError("Not a valid BMP file")
-        
-        # Get pixel data offset
-        pixel_data_offset = int.from_bytes(bmp_header[10:14], byteorder='little')
-        
-        # Read DIB Header (40 bytes for BITMAPINFOHEADER)
-        dib_header = f.read(40)
-        
-        # Extract image dimensions
-        width = int.from_bytes(dib_header[4:8], byteorder='little')
-        height = int.from_bytes(dib_header[8:12], byteorder='little')
-        bits_per_pixel = int.from_bytes(dib_header[14:16], byteorder='little')
-        
-        # Only support 24-bit BMP
-        if bits_per_pixel != 24:
-            raise ValueError(f"Only 24-bit BMP supported, got {bits_per_pixel}-bit")
-        
-        # Move to pixel data
-        f.seek(pixel_data_offset)
-        
-        # Calculate row size (must be multiple of 4 bytes)
-        row_size = ((width * 3 + 3) // 4) * 4
-        padding = row_size - (width * 3)
-        
-        # Read pixel data (BMP stores bottom to top)
-        pixel_data = []
-        for y in range(height):
-            row = []
-            for x in range(width):
-                # Read BGR values
-                b = int.from_bytes(f.read(1), byteorder='little')
-                g = int.from_bytes(f.read(1), byteorder='little')
-                r = int.from_bytes(f.read(1), byteorder='little')
-                row.append([b, g, r])
-            
-            # Skip padding bytes
-            f.read(padding)
-            
-            # Insert at beginning to reverse bottom-to-top storage
-            pixel_data.insert(0, row)
-        
-        return width, height, pixel_data
+    if np is not None:
+        width, height, image = read_bmp_array(filename)
+        return width, height, array_to_pixel_data(image)
+
+    width, height, row_size, bottom_up, data = _read_pixel_block(filename)
+
+    # Slice each row out of the block and split it into [B, G, R] triples
+    pixel_data = []
+    for y in range(height):
+        start = y * row_size
+        values = iter(data[start:start + width * 3])
+        pixel_data.append([[b, g, r] for b, g, r in zip(values, values, values)])
+
+    # BMP stores bottom to top; reverse once instead of inserting per row
+    if bottom_up:
+        pixel_data.reverse()
+
+    return width, height, pixel_data
+
+
+def read_bmp_image(filename):
+    """
+    Reads a BMP file into a compact ImageBuffer
+    Returns: (width, height, image)
+    """
+    width, height, row_size, bottom_up, data = _read_pixel_block(filename)
+
+    # Copy each row out of the padded block with a single slice assignment
+    image = ImageBuffer(width, height)
+    row_bytes = width * 3
+    for y in range(height):
+        src_y = height - 1 - y if bottom_up else y
+        start = src_y * row_size
+        image.row(y)[:] = data[start:start + row_bytes]
+
+    return width, height, image
 
 
 def get_pixel(pixel_data, x, y, width, height):
     """
     Get pixel value at (x, y) with boundary checking
+    pixel_data may be a 2D list or an ImageBuffer
     Returns [B, G, R] or [0, 0, 0] if out of bounds
     """
+    if isinstance(pixel_data, ImageBuffer):
+        return pixel_data.get_pixel(x, y)
     if x < 0 or x >= width or y < 0 or y >= height:
         return [0, 0, 0]
     return pixel_data[y][x]
@@ -3,57 +3,123 @@ Image Writer Module
 Writes BMP image files without using built-in image processing libraries
 """
 
-def write_bmp(filename, width, height, pixel_data):
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: write_bmp falls back to pure Python
+    np = None
+
+from image_buffer import ImageBuffer
+
+
+def build_bmp_header(width, height, top_down=False):
     """
-    Writes a BMP file from pixel data
-    pixel_data: 2D list where each element is [B, G, R]
+    Build the 54-byte BMP + DIB header for a 24-bit image
+    top_down stores a negative height, marking rows stored top row first
+    Returns: header bytes
     """
     # Calculate row size (must be multiple of 4 bytes)
     row_size = ((width * 3 + 3) // 4) * 4
-    padding = row_size - (width * 3)
-    
+
     # Calculate file size
     pixel_data_size = row_size * height
     file_size = 54 + pixel_data_size  # 14 (BMP header) + 40 (DIB header) + pixel data
-    
-    with open(filename, 'wb') as f:
+
+    return b''.join([
         # BMP Header (14 bytes)
-        f.write(b'BM')  # Signature
-        f.write(file_size.to_bytes(4, byteorder='little'))  # File size
-        f.write((0).to_bytes(2, byteorder='little'))  # Reserved
-        f.write((0).to_bytes(2, byteorder='little'))  # Reserved
-        f.write((54).to_bytes(4, byteorder='little'))  # Pixel data offset
-        
+        b'BM',  # Signature
+        file_size.to_bytes(4, byteorder='little'),  # File size
+        (0).to_bytes(2, byteorder='little'),  # Reserved
+        (0).to_bytes(2, byteorder='little'),  # Reserved
+        (54).to_bytes(4, byteorder='little'),  # Pixel data offset
+
         # DIB Header (40 bytes - BITMAPINFOHEADER)
-        f.write((40).to_bytes(4, byteorder='little'))  # DIB header size
-        f.write(width.to_bytes(4, byteorder='little'))  # Width
-        f.write(height.to_bytes(4, byteorder='little'))  # Height
-        f.write((1).to_bytes(2, byteorder='little'))  # Color planes
-        f.write((24).to_bytes(2, byteorder='little'))  # Bits per pixel
-        f.write((0).to_bytes(4, byteorder='little'))  # Compression (none)
-        f.write(pixel_data_size.to_bytes(4, byteorder='little'))  # Image size
-        f.write((2835).to_bytes(4, byteorder='little'))  # Horizontal resolution (72 DPI)
-        f.write((2835).to_bytes(4, byteorder='little'))  # Vertical resolution (72 DPI)
-        f.write((0).to_bytes(4, byteorder='little'))  # Colors in palette
-        f.write((0).to_bytes(4, byteorder='little'))  # Important colors
-        
-        # Write pixel data (bottom to top)
-        for y in range(height - 1, -1, -1):
-            for x in range(width):
-                # Get pixel, clamp values to 0-255
-                pixel = pixel_data[y][x]
-                b = max(0, min(255, int(pixel[0])))
-                g = max(0, min(255, int(pixel[1])))
-                r = max(0, min(255, int(pixel[2])))
-                
-                # Write BGR
-                f.write(b.to_bytes(1, byteorder='little'))
-                f.write(g.to_bytes(1, byteorder='little'))
-                f.write(r.to_bytes(1, byteorder='little'))
-            
-            # Write padding
-            for _ in range(padding):
-                f.write((0).to_bytes(1, byteorder='little'))
+        (40).to_bytes(4, byteorder='little'),  # DIB header size
+        width.to_bytes(4, byteorder='little'),  # Width
+        (-height if top_down else height).to_bytes(4, byteorder='little', signed=True),  # Height
+        (1).to_bytes(2, byteorder='little'),  # Color planes
+        (24).to_bytes(2, byteorder='little'),  # Bits per pixel
+        (0).to_bytes(4, byteorder='little'),  # Compression (none)
+        pixel_data_size.to_bytes(4, byteorder='little'),  # Image size
+        (2835).to_bytes(4, byteorder='little'),  # Horizontal resolution (72 DPI)
+        (2835).to_bytes(4, byteorder='little'),  # Vertical resolution (72 DPI)
+        (0).to_bytes(4, byteorder='little'),  # Colors in palette
+        (0).to_bytes(4, byteorder='little'),  # Important colors
+    ])
+
+
+def _clamp_values(values):
+    """Clamp a flat sequence of channel values to bytes (0-255)"""
+    try:
+        return bytes(values)
+    except (TypeError, ValueError):
+        # Floats or values outside 0-255 (e.g. raw interpolation results)
+        return bytes([max(0, min(255, int(v))) for v in values])
+
+
+def _array_pixel_block(width, height, pixel_data):
+    """Clamp an image with NumPy and lay it out as padded bottom-up rows"""
+    row_size = ((width * 3 + 3) // 4) * 4
+    image = np.asarray(pixel_data)[:height, :width]
+    if image.shape != (height, width, 3):
+        raise ValueError(f"Expected {width} x {height} pixels of [B, G, R], "
+                         f"got shape {image.shape}")
+
+    # One vectorized clamp; truncating casts match int() for in-range floats
+    if image.dtype != np.uint8:
+        image = np.clip(image, 0, 255).astype(np.uint8)
+
+    block = np.zeros((height, row_size), dtype=np.uint8)
+    block[:, :width * 3] = image[::-1].reshape(height, width * 3)
+    return block
+
+
+def _list_pixel_block(width, height, pixel_data):
+    """Clamp a 2D list of [B, G, R] values into padded bottom-up rows"""
+    row_size = ((width * 3 + 3) // 4) * 4
+    row_bytes = width * 3
+    block = bytearray(row_size * height)
+
+    for y in range(height):
+        row = pixel_data[y]
+        values = [value for x in range(width) for value in row[x][:3]]
+        start = (height - 1 - y) * row_size
+        block[start:start + row_bytes] = _clamp_values(values)
+
+    return block
+
+
+def _buffer_pixel_block(image):
+    """Lay out an ImageBuffer as padded bottom-up rows (already clamped)"""
+    row_size = ((image.width * 3 + 3) // 4) * 4
+    row_bytes = image.width * 3
+    block = bytearray(row_size * image.height)
+
+    for y in range(image.height):
+        start = (image.height - 1 - y) * row_size
+        block[start:start + row_bytes] = image.row(y)
+
+    return block
+
+
+def write_bmp(filename, width, height, pixel_data):
+    """
+    Writes a BMP file from pixel data
+    pixel_data: 2D list where each element is [B, G, R], an ImageBuffer,
+    or a height x width x 3 NumPy array
+    """
+    if isinstance(pixel_data, ImageBuffer):
+        if (pixel_data.width, pixel_data.height) != (width, height):
+            raise ValueError(f"Expected a {width} x {height} image, got {pixel_data!r}")
+        pixel_block = _buffer_pixel_block(pixel_data)
+    elif np is not None and width > 0 and height > 0:
+        pixel_block = _array_pixel_block(width, height, pixel_data)
+    else:
+        pixel_block = _list_pixel_block(width, height, pixel_data)
+
+    # The header and the whole pixel block go out in two large writes
+    with open(filename, 'wb') as f:
+        f.write(build_bmp_header(width, height))
+        f.write(pixel_block)
 
 
 def create_empty_image(width, height):
@@ -62,3 +128,26 @@ def create_empty_image(width, height):
     Returns: 2D list of [B, G, R] values
     """
     return [[[0, 0, 0] for _ in range(width)] for _ in range(height)]
+
+
+def create_empty_like(pixel_data, width, height):
+    """
+    Creates an empty image of the same kind as pixel_data
+    Returns: ImageBuffer or NumPy array for the same input, else 2D list of [B, G, R] values
+    """
+    if isinstance(pixel_data, ImageBuffer):
+        return ImageBuffer(width, height)
+    if np is not None and isinstance(pixel_data, np.ndarray):
+        return np.zeros((height, width, 3), dtype=pixel_data.dtype)
+    return create_empty_image(width, height)
+
+
+def set_pixel(image, x, y, bgr):
+    """
+    Store [B, G, R] at (x, y) of a 2D list or ImageBuffer
+    ImageBuffer values are clamped to 0-255; lists keep them as given
+    """
+    if isinstance(image, ImageBuffer):
+        image.set_pixel(x, y, bgr)
+    else:
+        image[y][x] = bgr
@@ -0,0 +1,78 @@
+"""
+Interpolation Kernels Module
+Implements resampling kernels and their lookup tables without using built-in libraries
+"""
+
+import math
+
+# Interpolation choices, fastest first
+INTERPOLATIONS = ("nearest", "bilinear", "bicubic", "lanczos")
+
+# Taps on each side of a source position; a kernel of radius r reads the
+# 2r pixels from floor(position) - r + 1 to floor(position) + r
+KERNEL_RADIUS = {"nearest": 1, "bilinear": 1, "bicubic": 2, "lanczos": 3}
+
+# Fractional offsets are quantized to 1 / KERNEL_LUT_SIZE of a pixel
+KERNEL_LUT_SIZE = 256
+
+# Keys cubic convolution parameter (-0.5 reproduces quadratics exactly)
+CUBIC_A = -0.5
+
+# Lobes of the Lanczos window (Lanczos-3)
+LANCZOS_LOBES = 3
+
+
+def check_interpolation(interpolation):
+    """Raise ValueError for an unknown interpolation name"""
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(f"Unknown interpolation '{interpolation}', "
+                         f"expected one of {INTERPOLATIONS}")
+
+
+def cubic_kernel(t):
+    """Keys cubic convolution kernel with parameter CUBIC_A"""
+    t = abs(t)
+    if t < 1:
+        return ((CUBIC_A + 2) * t - (CUBIC_A + 3)) * t * t + 1
+    if t < 2:
+        return ((CUBIC_A * t - 5 * CUBIC_A) * t + 8 * CUBIC_A) * t - 4 * CUBIC_A
+    return 0.0
+
+
+def lanczos_kernel(t):
+    """Lanczos kernel: sinc(t) * sinc(t / LANCZOS_LOBES) for |t| < LANCZOS_LOBES"""
+    if t == 0:
+        return 1.0
+    if abs(t) >= LANCZOS_LOBES:
+        return 0.0
+    x = math.pi * t
+    return LANCZOS_LOBES * math.sin(x) * math.sin(x / LANCZOS_LOBES) / (x * x)
+
+
+def build_kernel_table(kernel, radius, size=KERNEL_LUT_SIZE):
+    """
+    Precompute the tap weights of a kernel for every quantized fraction
+
+    Args:
+        kernel: weight as a function of distance in pixels
+        radius: taps on each side
+        size: fraction steps per pixel
+
+    Returns:
+        list of size + 1 tuples; entry q holds the weights of the taps at
+        offsets -radius + 1 .. radius for a fraction of q / size,
+        normalized to sum to 1
+    """
+    table = []
+    for q in range(size + 1):
+        fraction = q / size
+        weights = [kernel(fraction - offset) for offset in range(1 - radius, radius + 1)]
+        total = sum(weights)
+        table.append(tuple(w / total for w in weights))
+    return table
+
+
+KERNEL_TABLES = {
+    "bicubic": build_kernel_table(cubic_kernel, KERNEL_RADIUS["bicubic"]),
+    "lanczos": build_kernel_table(lanczos_kernel, KERNEL_RADIUS["lanczos"]),
+}
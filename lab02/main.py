@@ -3,7 +3,7 @@ Main Program for Affine Transformations
 Applies user-specified affine transformations to input images
 """
 
-from image_reader import read_bmp
+from image_reader import read_bmp_image
 from image_writer import write_bmp
 from scale import apply_scaling
 from rotate import apply_rotation
@@ -19,18 +19,22 @@ from affine_matrix import (
     matrix_multiply_point,
     print_matrix
 )
-from image_writer import create_empty_image
-from image_reader import get_pixel
+from image_reader import read_bmp_header
+from bmp_stream import BmpSource, BmpSink
+from warp import warp_affine, warp_streamed
+from kernels import INTERPOLATIONS
 import os
 
+# Inputs at least this large (in bytes) are streamed from disk in bands
+# instead of being loaded whole
+STREAMING_MIN_BYTES = 1 << 28
 
-def apply_combined_affine_transformation(pixel_data, width, height, 
-                                        sx, sy, angle, tx, ty, shx, shy):
+
+def plan_combined_transformation(width, height, sx, sy, angle, tx, ty, shx, shy):
     """
-    Apply combined affine transformation using matrix composition
+    Compose the combined affine transformation and lay out its output canvas
     
     Args:
-        pixel_data: 2D list of [B, G, R] pixel values
         width, height: original image dimensions
         sx, sy: scaling factors
         angle: rotation angle in degrees
@@ -38,10 +42,9 @@ def apply_combined_affine_transformation(pixel_data, width, height,
         shx, shy: shear factors
     
     Returns:
-        (new_width, new_height, new_pixel_data)
+        (new_width, new_height, inverse_matrix, x_coords, y_coords) for
+        warp_affine, with the source centre at (width / 2, height / 2)
     """
-    import math
-    
     # Create individual transformation matrices
     scale_mat = create_scaling_matrix(sx, sy)
     rotation_mat = create_rotation_matrix(angle)
@@ -100,9 +103,6 @@ def apply_combined_affine_transformation(pixel_data, width, height,
     new_width += abs(int(tx))
     new_height += abs(int(ty))
     
-    # Create output image
-    output = create_empty_image(new_width, new_height)
-    
     # Create inverse transformation matrix
     # For inverse: reverse order and invert each matrix
     inv_rotation_mat = create_rotation_matrix(-angle)
@@ -130,45 +130,68 @@ def apply_combined_affine_transformation(pixel_data, width, height,
     new_center_x = new_width / 2.0
     new_center_y = new_height / 2.0
     
+    # Account for translation and the bounding box offset
+    x_coords = [x - tx - new_center_x + (max_x + min_x) / 2 for x in range(new_width)]
+    y_coords = [y - ty - new_center_y + (max_y + min_y) / 2 for y in range(new_height)]
+    
+    return new_width, new_height, inverse_matrix, x_coords, y_coords
+
+
+def apply_combined_affine_transformation(pixel_data, width, height, 
+                                        sx, sy, angle, tx, ty, shx, shy, workers=1,
+                                        fixed_point=False, interpolation="bilinear"):
+    """
+    Apply combined affine transformation using matrix composition
+    
+    Args:
+        pixel_data: 2D list of [B, G, R] pixel values or an ImageBuffer
+        width, height: original image dimensions
+        sx, sy: scaling factors
+        angle: rotation angle in degrees
+        tx, ty: translation values
+        shx, shy: shear factors
+        workers: processes used by the warp (see warp_affine)
+        fixed_point: integer bilinear blend (see warp_affine)
+        interpolation: "nearest", "bilinear", "bicubic" or "lanczos" (see warp_affine)
+    
+    Returns:
+        (new_width, new_height, new_pixel_data)
+    """
+    new_width, new_height, inverse_matrix, x_coords, y_coords = plan_combined_transformation(
+        width, height, sx, sy, angle, tx, ty, shx, shy)
+    
     # Apply inverse transformation (backward mapping)
-    for y in range(new_height):
-        for x in range(new_width):
-            # Account for translation
-            out_x = x - tx - new_center_x + (max_x + min_x) / 2
-            out_y = y - ty - new_center_y + (max_y + min_y) / 2
-            
-            # Apply inverse transformation
-            src_x, src_y = matrix_multiply_point(inverse_matrix, out_x, out_y)
-            
-            # Translate back to original image coordinates
-            src_x += center_x
-            src_y += center_y
-            
-            # Use bilinear interpolation
-            src_x_int = int(src_x)
-            src_y_int = int(src_y)
-            
-            # Get the fractional parts
-            dx = src_x - src_x_int
-            dy = src_y - src_y_int
-            
-            # Get the four neighboring pixels
-            p00 = get_pixel(pixel_data, src_x_int, src_y_int, width, height)
-            p10 = get_pixel(pixel_data, src_x_int + 1, src_y_int, width, height)
-            p01 = get_pixel(pixel_data, src_x_int, src_y_int + 1, width, height)
-            p11 = get_pixel(pixel_data, src_x_int + 1, src_y_int + 1, width, height)
-            
-            # Bilinear interpolation for each channel
-            for c in range(3):
-                val = (p00[c] * (1 - dx) * (1 - dy) +
-                       p10[c] * dx * (1 - dy) +
-                       p01[c] * (1 - dx) * dy +
-                       p11[c] * dx * dy)
-                output[y][x][c] = int(val)
+    output = warp_affine(pixel_data, width, height, inverse_matrix,
+                         x_coords, y_coords, width / 2.0, height / 2.0, workers, fixed_point,
+                         interpolation)
     
     return new_width, new_height, output
 
 
+def transform_bmp_file(input_file, output_file, sx, sy, angle, tx, ty, shx, shy,
+                       fixed_point=False, interpolation="bilinear"):
+    """
+    Apply the combined affine transformation from one BMP file to another
+    without holding either image in memory
+    
+    The source is memory-mapped and read in windows, and output rows are
+    written as soon as each band is done (see warp_streamed). fixed_point
+    and interpolation are as for warp_affine.
+    
+    Returns:
+        (new_width, new_height)
+    """
+    with BmpSource(input_file) as source:
+        width, height = source.width, source.height
+        new_width, new_height, inverse_matrix, x_coords, y_coords = plan_combined_transformation(
+            width, height, sx, sy, angle, tx, ty, shx, shy)
+        with BmpSink(output_file, new_width) as sink:
+            warp_streamed(source, sink, inverse_matrix, x_coords, y_coords,
+                          width / 2.0, height / 2.0, fixed_point, interpolation)
+    
+    return new_width, new_height
+
+
 def get_float_input(prompt, default=None):
     """Get a float input from user with validation"""
     while True:
@@ -181,6 +204,17 @@ def get_float_input(prompt, default=None):
             print("Invalid input. Please enter a number.")
 
 
+def get_choice_input(prompt, choices, default):
+    """Get one of the given choices from user with validation"""
+    while True:
+        user_input = input(prompt).strip().lower()
+        if user_input == "":
+            return default
+        if user_input in choices:
+            return user_input
+        print(f"Invalid input. Please enter one of: {', '.join(choices)}.")
+
+
 def main():
     print("\n" + "="*60)
     print("AFFINE TRANSFORMATION PROGRAM")
@@ -199,9 +233,15 @@ def main():
         return
     
     try:
-        # Read input image
+        # Read input image; very large files are only opened here and
+        # streamed through the transformation later
+        streaming = os.path.getsize(input_file) >= STREAMING_MIN_BYTES
         print(f"\nReading image: {input_file}")
-        width, height, pixel_data = read_bmp(input_file)
+        if streaming:
+            with open(input_file, 'rb') as f:
+                width, height = read_bmp_header(f)[:2]
+        else:
+            width, height, pixel_data = read_bmp_image(input_file)
         print(f"Image size: {width} x {height} pixels")
         
         # Get transformation parameters from user
@@ -218,6 +258,9 @@ def main():
         ty = get_float_input("5. Vertical translation (default: 0.0): ", 0.0)
         shx = get_float_input("6. Horizontal shear factor (default: 0.0): ", 0.0)
         shy = get_float_input("7. Vertical shear factor (default: 0.0): ", 0.0)
+        interpolation = get_choice_input(
+            f"8. Interpolation ({'/'.join(INTERPOLATIONS)}, default: bilinear): ",
+            INTERPOLATIONS, "bilinear")
         
         # Display parameters
         print("\n" + "-"*60)
@@ -227,16 +270,9 @@ def main():
         print(f"Rotation Angle: {angle} degrees")
         print(f"Translation (Horizontal, Vertical): ({tx}, {ty})")
         print(f"Shear (Horizontal, Vertical): ({shx}, {shy})")
+        print(f"Interpolation: {interpolation}")
         print("-"*60)
         
-        # Apply combined transformation
-        print("\nApplying affine transformation...")
-        new_width, new_height, output = apply_combined_affine_transformation(
-            pixel_data, width, height, sx, sy, angle, tx, ty, shx, shy
-        )
-        
-        print(f"Output image size: {new_width} x {new_height} pixels")
-        
         # Create result directory if it doesn't exist
         if not os.path.exists("result"):
             os.makedirs("result")
@@ -249,8 +285,25 @@ def main():
             os.remove(output_file)
             print(f"\nPrevious output image removed.")
         
-        print(f"\nWriting output image: {output_file}")
-        write_bmp(output_file, new_width, new_height, output)
+        # Apply combined transformation
+        print("\nApplying affine transformation...")
+        if streaming:
+            print(f"Streaming output image: {output_file}")
+            new_width, new_height = transform_bmp_file(
+                input_file, output_file, sx, sy, angle, tx, ty, shx, shy,
+                interpolation=interpolation
+            )
+            print(f"Output image size: {new_width} x {new_height} pixels")
+        else:
+            # Spread large warps over every core
+            new_width, new_height, output = apply_combined_affine_transformation(
+                pixel_data, width, height, sx, sy, angle, tx, ty, shx, shy,
+                workers=os.cpu_count() or 1, interpolation=interpolation
+            )
+            print(f"Output image size: {new_width} x {new_height} pixels")
+            
+            print(f"\nWriting output image: {output_file}")
+            write_bmp(output_file, new_width, new_height, output)
         
         print("\n" + "="*60)
         print("TRANSFORMATION COMPLETED SUCCESSFULLY!")
@@ -0,0 +1,231 @@
+"""
+Mipmap Module
+Implements a 2x box-filtered image pyramid without using built-in libraries
+
+Level n of the pyramid halves the image n times; each of its pixels is the
+average of a 2^n x 2^n block of source pixels. A strong downscale samples
+the level whose pixels are about as large as one output pixel, so every
+source pixel contributes (no aliasing) and the warp reads a small image.
+
+With the warp's pixel convention (pixel i covers [i, i + 1), the image
+spans [0, width]) source position p lies at p / 2^n on level n.
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: levels are averaged in pure Python instead
+    np = None
+
+from image_buffer import ImageBuffer
+from warp import warp_affine
+
+# "off" samples the full-resolution source, "level" the finest level whose
+# pixels are no larger than one output pixel, "trilinear" blends the two
+# levels around the output pixel size
+MIPMAP_MODES = ("off", "level", "trilinear")
+
+# Slack when taking log2 of the footprint, so that an exact 1/2^n scale
+# picks level n despite rounding
+LEVEL_TOLERANCE = 1e-9
+
+
+class ImagePyramid:
+    """
+    Lazily built mipmap pyramid of one image
+
+    Level 0 is the image itself; coarser levels are computed the first
+    time they are asked for and kept in self.coarser. Pass the same
+    ImagePyramid to several downscales of one image to build its levels
+    only once; call reset() after editing the image's pixels in place.
+    """
+
+    def __init__(self, pixel_data, width, height):
+        """
+        Args:
+            pixel_data: 2D list of [B, G, R] values, an ImageBuffer or a NumPy array
+            width, height: image dimensions
+        """
+        self.pixel_data = pixel_data
+        self.width = width
+        self.height = height
+        self.coarser = []
+
+    @property
+    def depth(self):
+        """Number of levels, down to a 1 x 1 image"""
+        return 1 + max(0, math.ceil(math.log2(max(self.width, self.height, 1))))
+
+    def level(self, n):
+        """
+        Level n as (pixel_data, width, height), building the missing levels
+        n is clamped to the coarsest level
+        """
+        n = max(0, min(n, self.depth - 1))
+        while len(self.coarser) < n:
+            previous = self.coarser[-1] if self.coarser else (self.pixel_data, self.width,
+                                                               self.height)
+            self.coarser.append(downsample(*previous))
+        if n == 0:
+            return self.pixel_data, self.width, self.height
+        return self.coarser[n - 1]
+
+    def reset(self):
+        """Drop the built levels, e.g. after the image was edited in place"""
+        self.coarser = []
+
+
+def downsample(pixel_data, width, height):
+    """
+    Halve an image with a 2 x 2 box filter (averages rounded half up)
+
+    Odd sizes round up: the last column or row is averaged with itself.
+
+    Returns:
+        (pixel_data, new_width, new_height), of the same kind as pixel_data
+    """
+    new_width = (width + 1) // 2
+    new_height = (height + 1) // 2
+
+    if isinstance(pixel_data, list):
+        image = ImageBuffer.from_pixel_data(pixel_data, width, height)
+        return downsample(image, width, height)[0].to_pixel_data(), new_width, new_height
+
+    if np is not None:
+        if isinstance(pixel_data, ImageBuffer):
+            source = pixel_data.to_array()
+        else:
+            source = np.asarray(pixel_data)
+        # Odd sizes repeat the last row or column; even ones need no copy
+        if height % 2:
+            source = np.concatenate((source, source[-1:]), axis=0)
+        if width % 2:
+            source = np.concatenate((source, source[:, -1:]), axis=1)
+        # Row pairs first, so the widening pass reads whole rows
+        rows = source[0::2].astype(np.uint16)
+        rows += source[1::2]
+        total = rows[:, 0::2] + rows[:, 1::2]
+        total += 2
+        total >>= 2
+        output = total.astype(np.uint8)
+        if isinstance(pixel_data, ImageBuffer):
+            return ImageBuffer.from_array(output), new_width, new_height
+        return output, new_width, new_height
+
+    output = ImageBuffer(new_width, new_height)
+    for y in range(new_height):
+        top = pixel_data.row(2 * y)
+        bottom = pixel_data.row(min(2 * y + 1, height - 1))
+        sums = [a + b for a, b in zip(top, bottom)]
+        if width % 2:
+            sums += sums[-3:]
+        row = output.row(y)
+        for c in range(3):
+            row[c::3] = bytes([(a + b + 2) >> 2 for a, b in zip(sums[c::6], sums[c + 3::6])])
+    return output, new_width, new_height
+
+
+def check_mipmap(mipmap):
+    """Raise ValueError for an unknown mipmap mode"""
+    if mipmap not in MIPMAP_MODES:
+        raise ValueError(f"Unknown mipmap mode '{mipmap}', expected one of {MIPMAP_MODES}")
+
+
+def footprint(inverse_matrix, x_coords, y_coords):
+    """
+    Source pixels covered by one output pixel along its less reduced axis
+
+    The pyramid is isotropic, so the level follows the milder of the two
+    reductions and an anisotropic scale is never blurred beyond it.
+    """
+    step_x = abs(x_coords[1] - x_coords[0]) if len(x_coords) > 1 else 1.0
+    step_y = abs(y_coords[1] - y_coords[0]) if len(y_coords) > 1 else 1.0
+    along_x = math.hypot(inverse_matrix[0][0], inverse_matrix[1][0]) * step_x
+    along_y = math.hypot(inverse_matrix[0][1], inverse_matrix[1][1]) * step_y
+    return min(along_x, along_y)
+
+
+def warp_mipmapped(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                   center_x, center_y, mipmap="level", workers=1, fixed_point=False,
+                   interpolation="bilinear"):
+    """
+    warp_affine on the pyramid level that matches the output's scale
+
+    Args:
+        pixel_data: as for warp_affine, or an ImagePyramid of the image
+                    whose built levels are reused
+        width, height, inverse_matrix, x_coords, y_coords, center_x,
+        center_y: as for warp_affine
+        mipmap: "off" (warp the source), "level" (warp the finest level
+                whose pixels are no larger than one output pixel) or
+                "trilinear" (blend the two levels around the footprint)
+        workers, fixed_point, interpolation: as for warp_affine
+
+    Returns:
+        output image of the same kind as pixel_data
+
+    Scales that need no coarser level go straight to warp_affine. Otherwise
+    the levels are built for this call only, unless an ImagePyramid is
+    passed, so a plain image is never read through stale levels.
+    """
+    check_mipmap(mipmap)
+    if isinstance(pixel_data, ImagePyramid):
+        pyramid = pixel_data
+        pixel_data = pyramid.pixel_data
+    else:
+        pyramid = None
+    scale = footprint(inverse_matrix, x_coords, y_coords) if x_coords and y_coords else 0.0
+    if mipmap == "off" or scale <= 1 or (mipmap == "level" and scale < 2):
+        return warp_affine(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                           center_x, center_y, workers, fixed_point, interpolation)
+
+    if pyramid is None:
+        pyramid = ImagePyramid(pixel_data, width, height)
+    lod = math.log2(scale) + LEVEL_TOLERANCE
+    level = min(int(lod), pyramid.depth - 1)
+    output = _warp_level(pyramid, level, inverse_matrix, x_coords, y_coords,
+                         center_x, center_y, workers, fixed_point, interpolation)
+    fraction = lod - level
+    if mipmap != "trilinear" or fraction <= 2 * LEVEL_TOLERANCE or level + 1 >= pyramid.depth:
+        return output
+
+    coarser = _warp_level(pyramid, level + 1, inverse_matrix, x_coords, y_coords,
+                          center_x, center_y, workers, fixed_point, interpolation)
+    return blend_images(output, coarser, fraction)
+
+
+def _warp_level(pyramid, level, inverse_matrix, x_coords, y_coords, center_x, center_y,
+                workers, fixed_point, interpolation):
+    """Warp one level: positions (and the source centre) are divided by 2^level"""
+    pixel_data, width, height = pyramid.level(level)
+    scale = 1.0 / (1 << level)
+    level_matrix = [[value * scale for value in row[:2]] + [row[2] * scale]
+                    for row in inverse_matrix[:2]] + [list(inverse_matrix[2])]
+    return warp_affine(pixel_data, width, height, level_matrix, x_coords, y_coords,
+                       center_x * scale, center_y * scale, workers, fixed_point, interpolation)
+
+
+def blend_images(first, second, fraction):
+    """
+    (1 - fraction) * first + fraction * second for two images of the same
+    kind and size, with 8-bit weights (results are rounded)
+    """
+    weight = int(fraction * 256 + 0.5)
+    keep = 256 - weight
+
+    if isinstance(first, list):
+        return [[[(a * keep + b * weight + 128) >> 8 for a, b in zip(p, q)]
+                 for p, q in zip(row, other)] for row, other in zip(first, second)]
+
+    if np is not None:
+        a = first.to_array() if isinstance(first, ImageBuffer) else first
+        b = second.to_array() if isinstance(second, ImageBuffer) else second
+        output = ((a.astype(np.uint32) * keep + b.astype(np.uint32) * weight + 128)
+                  >> 8).astype(np.uint8)
+        if isinstance(first, ImageBuffer):
+            return ImageBuffer.from_array(output)
+        return output
+
+    data = bytes([(a * keep + b * weight + 128) >> 8 for a, b in zip(first.data, second.data)])
+    return ImageBuffer(first.width, first.height, data)
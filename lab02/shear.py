@@ -3,21 +3,23 @@ Shear Transformation Module
 Implements image shearing without using built-in libraries
 """
 
-from affine_matrix import create_shear_matrix, matrix_multiply_point
-from image_reader import get_pixel
-from image_writer import create_empty_image
+from warp import warp_affine, centered_coords
 
 
-def apply_shear(pixel_data, width, height, shx, shy):
+def apply_shear(pixel_data, width, height, shx, shy, workers=1, fixed_point=False,
+                interpolation="bilinear"):
     """
     Apply shear transformation to an image
     
     Args:
-        pixel_data: 2D list of [B, G, R] pixel values
+        pixel_data: 2D list of [B, G, R] pixel values or an ImageBuffer
         width: original image width
         height: original image height
         shx: horizontal shear factor (shears along x-axis)
         shy: vertical shear factor (shears along y-axis)
+        workers: processes used by the warp (see warp_affine)
+        fixed_point: integer bilinear blend (see warp_affine)
+        interpolation: "nearest", "bilinear", "bicubic" or "lanczos" (see warp_affine)
     
     Returns:
         (new_width, new_height, new_pixel_data)
@@ -28,9 +30,6 @@ def apply_shear(pixel_data, width, height, shx, shy):
     new_width = int(width + height * abs(shx))
     new_height = int(height + width * abs(shy))
     
-    # Create empty output image
-    output = create_empty_image(new_width, new_height)
-    
     # Get centers
     center_x = width / 2.0
     center_y = height / 2.0
@@ -55,40 +54,11 @@ def apply_shear(pixel_data, width, height, shx, shy):
         [0, 0, 1]
     ]
     
-    # Apply inverse transformation (backward mapping)
-    for y in range(new_height):
-        for x in range(new_width):
-            # Translate to center of output image
-            out_x = x - new_center_x
-            out_y = y - new_center_y
-            
-            # Apply inverse shear
-            src_x, src_y = matrix_multiply_point(inverse_shear_matrix, out_x, out_y)
-            
-            # Translate back to original image coordinates
-            src_x += center_x
-            src_y += center_y
-            
-            # Use bilinear interpolation
-            src_x_int = int(src_x)
-            src_y_int = int(src_y)
-            
-            # Get the fractional parts
-            dx = src_x - src_x_int
-            dy = src_y - src_y_int
-            
-            # Get the four neighboring pixels
-            p00 = get_pixel(pixel_data, src_x_int, src_y_int, width, height)
-            p10 = get_pixel(pixel_data, src_x_int + 1, src_y_int, width, height)
-            p01 = get_pixel(pixel_data, src_x_int, src_y_int + 1, width, height)
-            p11 = get_pixel(pixel_data, src_x_int + 1, src_y_int + 1, width, height)
-            
-            # Bilinear interpolation for each channel
-            for c in range(3):
-                val = (p00[c] * (1 - dx) * (1 - dy) +
-                       p10[c] * dx * (1 - dy) +
-                       p01[c] * (1 - dx) * dy +
-                       p11[c] * dx * dy)
-                output[y][x][c] = int(val)
+    # Apply inverse transformation (backward mapping) around the centers
+    output = warp_affine(pixel_data, width, height, inverse_shear_matrix,
+                         centered_coords(new_width, new_center_x),
+                         centered_coords(new_height, new_center_y),
+                         center_x, center_y, workers, fixed_point,
+                         interpolation)
     
     return new_width, new_height, output
@@ -0,0 +1,188 @@
+"""
+Three-Shear Rotation Module
+Implements rotation as three 1-D shears (Paeth) without using built-in libraries
+
+A rotation by r splits into shears along x, y and x again:
+    R(r) = Sx(a) * Sy(b) * Sx(a),  a = -tan(r / 2),  b = sin(r)
+Each shear moves whole rows (or columns) by a constant fractional offset,
+so every pass is a shifted copy blended with 1-D linear interpolation.
+Angles are first reduced to [-45°, 45°] by an exact 90° turn, which keeps
+the shear factors at or below 1.
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: rows are shifted in pure Python instead
+    np = None
+
+from affine_matrix import create_rotation_matrix
+from image_buffer import ImageBuffer
+from warp import warp_affine, centered_coords
+
+
+def rotate_three_shear(pixel_data, width, height, angle_degrees, new_width, new_height):
+    """
+    Rotate an image onto a new_width x new_height canvas with three shears
+
+    The canvas and centring match apply_rotation: output pixel (x, y)
+    shows source position R(-angle) * (x - new_width / 2, y - new_height / 2)
+    + (width / 2, height / 2).
+
+    Args:
+        pixel_data: 2D list of [B, G, R] values, an ImageBuffer or a NumPy array
+        width, height: source image dimensions
+        angle_degrees: rotation angle in degrees (counter-clockwise)
+        new_width, new_height: output canvas size
+
+    Returns:
+        output image of the same kind as pixel_data
+    """
+    # Exact quarter turns first, leaving a residual angle in [-45°, 45°]
+    quarter_turns = round(angle_degrees / 90.0)
+    residual = angle_degrees - quarter_turns * 90.0
+    if quarter_turns % 4:
+        if quarter_turns % 2:
+            turned_width, turned_height = height, width
+        else:
+            turned_width, turned_height = width, height
+        pixel_data = warp_affine(pixel_data, width, height,
+                                 create_rotation_matrix(-quarter_turns * 90.0),
+                                 centered_coords(turned_width, turned_width / 2.0),
+                                 centered_coords(turned_height, turned_height / 2.0),
+                                 width / 2.0, height / 2.0)
+        width, height = turned_width, turned_height
+
+    # Backward shears for R(-residual): a = tan(residual / 2), b = -sin(residual)
+    angle_rad = residual * math.pi / 180.0
+    a = math.tan(angle_rad / 2.0)
+    b = -math.sin(angle_rad)
+
+    center_x = width / 2.0
+    center_y = height / 2.0
+    new_center_x = new_width / 2.0
+    new_center_y = new_height / 2.0
+
+    # The first two passes share the output's x grid, widened by a margin
+    # that covers the horizontal shift of the last pass
+    margin = int(math.ceil(abs(a) * max(new_center_y, new_height - new_center_y))) + 2
+    shear_width = new_width + 2 * margin
+
+    # Pass 1 (rows of the source): T1(x, y) = I(x + a * y, y)
+    row_offsets = [-new_center_x - margin + a * (j - center_y) + center_x
+                   for j in range(height)]
+    # Pass 2 (columns of T1): T2(x, y) = T1(x, y + b * x)
+    column_offsets = [-new_center_y + b * (i - new_center_x - margin) + center_y
+                      for i in range(shear_width)]
+    # Pass 3 (rows of T2): out(x, y) = T2(x + a * y, y)
+    final_offsets = [-new_center_x + a * (y - new_center_y) + new_center_x + margin
+                     for y in range(new_height)]
+
+    if np is not None:
+        return _rotate_numpy(pixel_data, width, height, shear_width, new_width, new_height,
+                             row_offsets, column_offsets, final_offsets)
+    return _rotate_python(pixel_data, width, height, shear_width, new_width, new_height,
+                          row_offsets, column_offsets, final_offsets)
+
+
+def _rotate_numpy(pixel_data, width, height, shear_width, new_width, new_height,
+                  row_offsets, column_offsets, final_offsets):
+    """Three vectorized passes over float arrays"""
+    if isinstance(pixel_data, ImageBuffer):
+        source = pixel_data.to_array()
+    else:
+        source = np.asarray(pixel_data)
+    image = source.astype(np.float32)
+
+    image = _shift_rows(image, row_offsets, shear_width)
+    image = _shift_rows(image.transpose(1, 0, 2), column_offsets, new_height).transpose(1, 0, 2)
+    image = _shift_rows(image, final_offsets, new_width)
+
+    # Round once at the end; the intermediate passes keep full precision
+    output = np.floor(image + 0.5)
+    if isinstance(pixel_data, ImageBuffer):
+        return ImageBuffer.from_array(np.clip(output, 0, 255).astype(np.uint8))
+    if isinstance(pixel_data, np.ndarray):
+        return np.clip(output, 0, 255).astype(np.uint8)
+    return output.astype(np.int64).tolist()
+
+
+def _shift_rows(rows, offsets, out_width):
+    """
+    out[j, i] = rows[j] linearly interpolated at i + offsets[j]
+    Positions outside a row read black
+    """
+    count, width = rows.shape[:2]
+    output = np.zeros((count, out_width, 3), dtype=np.float32)
+
+    # One black column on each side, so both neighbours are plain slices
+    padded = np.zeros((count, width + 2, 3), dtype=np.float32)
+    padded[:, 1:width + 1] = rows
+
+    for j, offset in enumerate(offsets):
+        shift = math.floor(offset)
+        fraction = offset - shift
+        begin = max(0, -1 - shift)
+        end = min(out_width, width - shift)
+        if begin >= end:
+            continue
+        span = output[j, begin:end]
+        np.multiply(padded[j, begin + shift + 1:end + shift + 1], 1 - fraction, out=span)
+        span += padded[j, begin + shift + 2:end + shift + 2] * fraction
+
+    return output
+
+
+def _rotate_python(pixel_data, width, height, shear_width, new_width, new_height,
+                   row_offsets, column_offsets, final_offsets):
+    """Three passes over flat rows of floats"""
+    if isinstance(pixel_data, ImageBuffer):
+        rows = [list(pixel_data.row(y)) for y in range(height)]
+    else:
+        rows = [[value for pixel in row[:width] for value in pixel[:3]]
+                for row in pixel_data[:height]]
+
+    rows = [_shift_row(row, width, offset, shear_width) for row, offset in zip(rows, row_offsets)]
+    columns = _transpose(rows, shear_width)
+    columns = [_shift_row(column, height, offset, new_height)
+               for column, offset in zip(columns, column_offsets)]
+    rows = _transpose(columns, new_height)
+    rows = [_shift_row(row, shear_width, offset, new_width) for row, offset in zip(rows, final_offsets)]
+
+    if isinstance(pixel_data, ImageBuffer):
+        # Every pass is a convex blend of bytes, so values stay within 0-255
+        data = bytearray()
+        for row in rows:
+            data += bytes([int(value + 0.5) for value in row])
+        return ImageBuffer(new_width, new_height, data)
+    output = []
+    for row in rows:
+        values = iter([math.floor(value + 0.5) for value in row])
+        output.append([[b, g, r] for b, g, r in zip(values, values, values)])
+    return output
+
+
+def _shift_row(row, width, offset, out_width):
+    """One row of pixels (flat B, G, R values) interpolated at i + offset"""
+    shift = math.floor(offset)
+    fraction = offset - shift
+    weight = 1 - fraction
+    output = [0.0] * (out_width * 3)
+
+    # Only positions with a neighbour inside the row can be non-black; one
+    # black pixel on each side turns both neighbours into plain slices
+    begin = max(0, -1 - shift)
+    end = min(out_width, width - shift)
+    if begin < end:
+        padded = [0, 0, 0] + row + [0, 0, 0]
+        left = padded[(begin + shift + 1) * 3:(end + shift + 1) * 3]
+        right = padded[(begin + shift + 2) * 3:(end + shift + 2) * 3]
+        output[begin * 3:end * 3] = [p0 * weight + p1 * fraction for p0, p1 in zip(left, right)]
+
+    return output
+
+
+def _transpose(rows, width):
+    """Swap rows and columns of flat B, G, R rows"""
+    return [[value for row in rows for value in row[i * 3:i * 3 + 3]] for i in range(width)]
@@ -0,0 +1,145 @@
+"""
+Transform Chain Module
+Implements lazily composed affine transformations without using built-in libraries
+
+Calling apply_scaling, apply_rotation, ... one after another resamples
+the image once per step, and every step blurs it a little more and
+allocates a full intermediate image. A Transform only multiplies 3x3
+matrices until render(), which lays out the output canvas once and warps
+the source a single time:
+
+    new_width, new_height, output = (Transform(image, width, height)
+                                     .scale(0.5, 0.5)
+                                     .rotate(30)
+                                     .translate(10, 0)
+                                     .shear(0.2, 0)
+                                     .render())
+"""
+
+from affine_matrix import (
+    create_identity_matrix,
+    create_scaling_matrix,
+    create_rotation_matrix,
+    create_translation_matrix,
+    create_shear_matrix,
+    combine_transformations,
+    invert_affine_matrix,
+    matrix_multiply_point
+)
+from mipmap import warp_mipmapped
+
+# Slack added to canvas extents before truncating them to whole pixels, so
+# that composition rounding (e.g. 299.99999999) does not lose a column
+BOUNDS_TOLERANCE = 1e-9
+
+
+class Transform:
+    """
+    Affine transformation of one image, composed lazily
+
+    Every method returns a new Transform with the operation appended
+    (applied after the ones before it); the image is only resampled by
+    render(). The steps act on coordinates centred on the source image,
+    as the apply_* functions do.
+    """
+
+    def __init__(self, pixel_data, width, height, matrix=None):
+        """
+        Args:
+            pixel_data: 2D list of [B, G, R] values, an ImageBuffer, a NumPy
+                        array or a mipmap.ImagePyramid (see apply_scaling)
+            width, height: source image dimensions
+            matrix: forward 3x3 matrix from centred source to output
+                    coordinates (default: identity)
+        """
+        self.pixel_data = pixel_data
+        self.width = width
+        self.height = height
+        self.matrix = create_identity_matrix() if matrix is None else matrix
+
+    def then(self, matrix):
+        """Append an arbitrary forward 3x3 affine matrix"""
+        return Transform(self.pixel_data, self.width, self.height,
+                         combine_transformations([matrix, self.matrix]))
+
+    def scale(self, sx, sy):
+        """Append a scaling by (sx, sy), as apply_scaling"""
+        return self.then(create_scaling_matrix(sx, sy))
+
+    def rotate(self, angle_degrees):
+        """Append a counter-clockwise rotation, as apply_rotation"""
+        return self.then(create_rotation_matrix(angle_degrees))
+
+    def translate(self, tx, ty):
+        """Append a translation, as apply_translation (fractions are kept)"""
+        return self.then(create_translation_matrix(tx, ty))
+
+    def shear(self, shx, shy):
+        """Append a shear by (shx, shy), as apply_shear"""
+        return self.then(create_shear_matrix(shx, shy))
+
+    def _linear(self):
+        """The composed matrix without its translation"""
+        return [list(self.matrix[0][:2]) + [0], list(self.matrix[1][:2]) + [0], [0, 0, 1]]
+
+    def bounds(self):
+        """
+        Lay out the output canvas
+
+        The canvas covers the transformed image both with and without the
+        composed translation, so a translation shows as an offset on a
+        larger canvas like apply_translation, and a chain of one step gets
+        the canvas of the matching apply_* function.
+
+        Returns:
+            (new_width, new_height, x_coords, y_coords): the canvas size and
+            the output coordinate of every column and row, with the
+            translation removed (ready for the inverse of the linear part)
+        """
+        linear = self._linear()
+        tx, ty = self.matrix[0][2], self.matrix[1][2]
+
+        half_width = self.width / 2.0
+        half_height = self.height / 2.0
+        corners = [matrix_multiply_point(linear, x, y)
+                   for x in (-half_width, half_width) for y in (-half_height, half_height)]
+        min_x = min(x for x, _ in corners)
+        max_x = max(x for x, _ in corners)
+        min_y = min(y for _, y in corners)
+        max_y = max(y for _, y in corners)
+
+        # Union of the untranslated and the translated bounding box
+        low_x, high_x = min(min_x, min_x + tx), max(max_x, max_x + tx)
+        low_y, high_y = min(min_y, min_y + ty), max(max_y, max_y + ty)
+        new_width = int(high_x - low_x + BOUNDS_TOLERANCE)
+        new_height = int(high_y - low_y + BOUNDS_TOLERANCE)
+
+        # Centre the canvas on the box, as the apply_* functions do
+        offset_x = (low_x + high_x) / 2.0 - new_width / 2.0 - tx
+        offset_y = (low_y + high_y) / 2.0 - new_height / 2.0 - ty
+        x_coords = [x + offset_x for x in range(new_width)]
+        y_coords = [y + offset_y for y in range(new_height)]
+        return new_width, new_height, x_coords, y_coords
+
+    def render(self, workers=1, fixed_point=False, interpolation="bilinear", mipmap="level"):
+        """
+        Resample the source once through the composed transformation
+
+        Args:
+            workers, fixed_point, interpolation: as for warp_affine
+            mipmap: pyramid level choice for reductions, as for apply_scaling
+
+        Returns:
+            (new_width, new_height, new_pixel_data)
+        """
+        new_width, new_height, x_coords, y_coords = self.bounds()
+        if new_width == 0 or new_height == 0:
+            # Nothing to sample; a collapsed image cannot be inverted
+            inverse_matrix = create_identity_matrix()
+        else:
+            inverse_matrix = invert_affine_matrix(self._linear())
+
+        output = warp_mipmapped(self.pixel_data, self.width, self.height, inverse_matrix,
+                                x_coords, y_coords, self.width / 2.0, self.height / 2.0,
+                                mipmap, workers, fixed_point, interpolation)
+        return new_width, new_height, output
@@ -3,31 +3,35 @@ Translation Transformation Module
 Implements image translation without using built-in libraries
 """
 
-from affine_matrix import create_translation_matrix, matrix_multiply_point
-from image_reader import get_pixel
-from image_writer import create_empty_image
+from image_writer import create_empty_like
+from image_buffer import ImageBuffer
+from kernels import check_interpolation
 
 
-def apply_translation(pixel_data, width, height, tx, ty):
+def apply_translation(pixel_data, width, height, tx, ty, interpolation="bilinear"):
     """
     Apply translation transformation to an image
     
     Args:
-        pixel_data: 2D list of [B, G, R] pixel values
+        pixel_data: 2D list of [B, G, R] pixel values, an ImageBuffer or a NumPy array
         width: original image width
         height: original image height
         tx: horizontal translation (positive = right, negative = left)
         ty: vertical translation (positive = down, negative = up)
+        interpolation: accepted for a uniform interface; translation moves
+                       whole pixels, so every kernel gives the same result
     
     Returns:
         (new_width, new_height, new_pixel_data)
     """
+    check_interpolation(interpolation)
+    
     # Calculate new dimensions to fit translated image
     new_width = width + abs(int(tx))
     new_height = height + abs(int(ty))
     
     # Create empty output image
-    output = create_empty_image(new_width, new_height)
+    output = create_empty_like(pixel_data, new_width, new_height)
     
     # Determine offset for placing the image
     offset_x = max(0, int(tx))
@@ -37,16 +41,17 @@ def apply_translation(pixel_data, width, height, tx, ty):
     src_offset_x = max(0, -int(tx))
     src_offset_y = max(0, -int(ty))
     
-    # Apply translation (forward mapping)
-    for y in range(height):
-        for x in range(width):
-            # Calculate destination coordinates
-            dst_x = x + offset_x
-            dst_y = y + offset_y
-            
-            # Check if destination is within bounds
-            if 0 <= dst_x < new_width and 0 <= dst_y < new_height:
-                # Copy pixel from source to destination
-                output[dst_y][dst_x] = pixel_data[y][x][:]
+    # Apply translation (forward mapping). The canvas grows by the offset,
+    # so every source row lands whole inside its destination row and is
+    # copied as one slice.
+    if isinstance(pixel_data, ImageBuffer):
+        for y in range(height):
+            output.row(y + offset_y)[offset_x * 3:(offset_x + width) * 3] = pixel_data.row(y)
+    elif isinstance(pixel_data, list):
+        for y in range(height):
+            output[y + offset_y][offset_x:offset_x + width] = [
+                pixel[:] for pixel in pixel_data[y][:width]]
+    else:
+        output[offset_y:offset_y + height, offset_x:offset_x + width] = pixel_data[:height, :width]
     
     return new_width, new_height, output
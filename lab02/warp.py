@@ -0,0 +1,973 @@
+"""
+Warp Engine Module
+Backward-mapping affine warp with selectable interpolation shared by all transforms
+"""
+
+import math
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the pure-Python loop is used instead
+    np = None
+
+from image_buffer import ImageBuffer
+from kernels import KERNEL_LUT_SIZE, KERNEL_RADIUS, KERNEL_TABLES, check_interpolation
+
+# Output pixels per vectorized step; small bands keep temporaries in cache
+BAND_PIXELS = 1 << 14
+
+# Largest offset (in pixels) from whole-pixel positions still treated as an
+# exact pixel copy; absorbs rounding such as cos(90°) = 6e-17
+EXACT_TOLERANCE = 1e-6
+
+# Smallest output (in pixels) worth spreading over processes; below this,
+# starting the pool costs more than the warp itself
+PARALLEL_MIN_PIXELS = 1 << 18
+
+# Bands handed to each worker; several per worker even out rows of
+# different span lengths (e.g. the corners of a rotation)
+BANDS_PER_WORKER = 4
+
+# Output rows per band and columns per tile of a streamed warp; each tile
+# reads only the source region its pixels map to
+STREAM_BAND_ROWS = 64
+STREAM_TILE_COLUMNS = 512
+
+# Fixed-point bilinear mode: fractional offsets are rounded to FIXED_BITS
+# bits and blended with integer weights
+FIXED_BITS = 8
+FIXED_ONE = 1 << FIXED_BITS
+
+# Separable weight table: FIXED_WEIGHTS[f] holds the weights of the near
+# and far neighbour for a fraction of f / FIXED_ONE
+FIXED_WEIGHTS = [(FIXED_ONE - f, f) for f in range(FIXED_ONE + 1)]
+
+
+def centered_coords(size, center):
+    """
+    Output coordinates of a row or column relative to a center
+    Returns: [i - center for i in range(size)]
+    """
+    return [i - center for i in range(size)]
+
+
+def warp_affine(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                center_x, center_y, workers=1, fixed_point=False, interpolation="bilinear"):
+    """
+    Backward-map every output pixel into the source image
+
+    For output pixel (x, y) the source position is
+        src_x, src_y = inverse_matrix * (x_coords[x], y_coords[y]) + (center_x, center_y)
+    and by default the value is the bilinear blend of the four neighbouring
+    source pixels (out-of-bounds neighbours are black), truncated to int.
+
+    Args:
+        pixel_data: 2D list of [B, G, R] values, an ImageBuffer, or a
+                    height x width x 3 NumPy array
+        width, height: source image dimensions
+        inverse_matrix: 3x3 matrix mapping centered output to centered source coordinates
+        x_coords: centered output coordinate of each column (output width = len)
+        y_coords: centered output coordinate of each row (output height = len)
+        center_x, center_y: source center added after the matrix
+        workers: number of processes; with more than one, large byte images
+                 (ImageBuffers and uint8 arrays) are warped in bands of
+                 output rows on a process pool, see warp_parallel
+        fixed_point: blend with integer weights instead of floats; source
+                     offsets are rounded to FIXED_BITS fraction bits and
+                     the result stays within 1 of the float blend
+        interpolation: "nearest" (closest pixel, for previews), "bilinear",
+                       "bicubic" (Keys, 4 x 4 taps) or "lanczos" (Lanczos-3,
+                       6 x 6 taps); see kernels.py. fixed_point needs bilinear
+
+    Returns:
+        output image of the same kind as pixel_data; lists keep the raw
+        interpolated ints, buffers and arrays are clamped to 0-255
+
+    Maps that only pick whole source pixels (integer shifts, multiples of
+    90°, integer decimation) skip interpolation and copy pixels instead;
+    so does integer magnification for nearest and bilinear, which
+    replicates pixels. See exact_index_map.
+    """
+    _check_options(fixed_point, interpolation)
+    index_map = exact_index_map(width, height, inverse_matrix, x_coords, y_coords,
+                                center_x, center_y, _replicates(interpolation))
+    if index_map is not None:
+        return _copy_pixels(pixel_data, width, height, *index_map)
+
+    if workers > 1 and len(x_coords) * len(y_coords) >= PARALLEL_MIN_PIXELS \
+            and _is_byte_image(pixel_data):
+        return warp_parallel(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                             center_x, center_y, workers, fixed_point, interpolation)
+    return _warp_serial(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                        center_x, center_y, fixed_point=fixed_point, interpolation=interpolation)
+
+
+def _check_options(fixed_point, interpolation):
+    """Raise ValueError for an unknown interpolation or fixed point without bilinear"""
+    check_interpolation(interpolation)
+    if fixed_point and interpolation != "bilinear":
+        raise ValueError(f"fixed_point only applies to bilinear interpolation, "
+                         f"not '{interpolation}'")
+
+
+def _replicates(interpolation):
+    """Whether integer magnification may be done by pixel replication"""
+    return interpolation in ("nearest", "bilinear")
+
+
+def _warp_serial(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                 center_x, center_y, window=None, fixed_point=False, interpolation="bilinear"):
+    """
+    Interpolating warp in the current process
+
+    window: (x, y, width, height) of the part of the source held in
+    pixel_data, or None for the whole image; it must contain every source
+    pixel the output reads (see _source_window)
+    """
+    if interpolation != "bilinear":
+        if np is not None:
+            return _resample_numpy(pixel_data, width, height, inverse_matrix, x_coords,
+                                   y_coords, center_x, center_y, window, interpolation)
+        return _resample_python(pixel_data, width, height, inverse_matrix, x_coords,
+                                y_coords, center_x, center_y, window, interpolation)
+    if np is not None:
+        return _warp_numpy(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                           center_x, center_y, window, fixed_point)
+    return _warp_python(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                        center_x, center_y, window, fixed_point)
+
+
+def _is_byte_image(pixel_data):
+    """True for images stored as plain B, G, R bytes (ImageBuffer or uint8 array)"""
+    if isinstance(pixel_data, ImageBuffer):
+        return True
+    return np is not None and isinstance(pixel_data, np.ndarray) and \
+        pixel_data.dtype == np.uint8 and pixel_data.ndim == 3 and pixel_data.shape[2] == 3
+
+
+def warp_parallel(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                  center_x, center_y, workers, fixed_point=False, interpolation="bilinear"):
+    """
+    warp_affine split into bands of output rows on a pool of processes
+
+    Output rows are independent, so each band is warped on its own. The
+    source is copied once into shared memory, where every worker reads it
+    without a pickled copy, and each band is written straight into a shared
+    output buffer. The result is identical to the single-process warp.
+
+    Args:
+        pixel_data: an ImageBuffer or a height x width x 3 uint8 NumPy array
+        workers: number of processes
+        (other arguments as for warp_affine)
+
+    Returns:
+        output image of the same kind as pixel_data
+    """
+    if not _is_byte_image(pixel_data):
+        raise ValueError("warp_parallel needs an ImageBuffer or a uint8 NumPy array")
+
+    new_width, new_height = len(x_coords), len(y_coords)
+    row_bytes = new_width * 3
+    source_size = width * height * 3
+    band_rows = max(1, -(-new_height // (workers * BANDS_PER_WORKER)))
+
+    # Shared memory cannot be empty
+    source = SharedMemory(create=True, size=max(1, source_size))
+    target = SharedMemory(create=True, size=max(1, new_height * row_bytes))
+    try:
+        if isinstance(pixel_data, ImageBuffer):
+            source.buf[:source_size] = pixel_data.data
+        else:
+            source.buf[:source_size] = np.ascontiguousarray(pixel_data).reshape(-1)
+        # New shared memory is zero-filled, so rows outside every span are black
+
+        tasks = [(source.name, target.name, width, height, inverse_matrix, x_coords,
+                  y_coords[start:start + band_rows], center_x, center_y, fixed_point,
+                  interpolation, start * row_bytes)
+                 for start in range(0, new_height, band_rows)]
+        with get_context().Pool(min(workers, len(tasks))) as pool:
+            pool.map(_warp_band, tasks)
+
+        data = bytearray(target.buf[:new_height * row_bytes])
+    finally:
+        source.close()
+        source.unlink()
+        target.close()
+        target.unlink()
+
+    output = ImageBuffer(new_width, new_height, data)
+    if isinstance(pixel_data, ImageBuffer):
+        return output
+    return output.to_array()
+
+
+def _warp_band(task):
+    """Pool worker: warp one band of output rows into the shared output"""
+    (source_name, target_name, width, height, inverse_matrix, x_coords, y_coords,
+     center_x, center_y, fixed_point, interpolation, offset) = task
+    source = SharedMemory(name=source_name)
+    target = SharedMemory(name=target_name)
+    try:
+        image = ImageBuffer(width, height, source.buf[:width * height * 3])
+        band = _warp_serial(image, width, height, inverse_matrix, x_coords, y_coords,
+                            center_x, center_y, fixed_point=fixed_point,
+                            interpolation=interpolation)
+        target.buf[offset:offset + len(band.data)] = band.data
+        # Views of the shared blocks must be gone before they are closed
+        image.data.release()
+        del image, band
+    finally:
+        source.close()
+        target.close()
+
+
+def warp_streamed(source, sink, inverse_matrix, x_coords, y_coords, center_x, center_y,
+                  fixed_point=False, interpolation="bilinear"):
+    """
+    warp_affine from a file into a file, one band of output rows at a time
+
+    Each band is split into tiles of columns, and every tile reads only the
+    source window its pixels map to, so neither image has to fit in memory.
+    The output is identical to warp_affine on the whole image. Memory use is
+    one band plus one window; the window grows with the rotation angle.
+
+    Args:
+        source: object with width, height and read_window(x, y, width, height)
+                returning an ImageBuffer, e.g. bmp_stream.BmpSource
+        sink: object with write_rows(image) taking an ImageBuffer of whole
+              output rows, e.g. bmp_stream.BmpSink
+        (other arguments as for warp_affine)
+    """
+    _check_options(fixed_point, interpolation)
+    width, height = source.width, source.height
+    new_width, new_height = len(x_coords), len(y_coords)
+    index_map = exact_index_map(width, height, inverse_matrix, x_coords, y_coords,
+                                center_x, center_y, _replicates(interpolation))
+    if index_map is None:
+        spans = row_spans(width, height, inverse_matrix, x_coords, y_coords, center_x, center_y,
+                          KERNEL_RADIUS[interpolation])
+
+    for start in range(0, new_height, STREAM_BAND_ROWS):
+        stop = min(new_height, start + STREAM_BAND_ROWS)
+        band = ImageBuffer(new_width, stop - start)
+
+        # Only columns inside some row's span can be non-black
+        if index_map is None:
+            band_spans = [span for span in spans[start:stop] if span[0] < span[1]]
+            begin = min((span[0] for span in band_spans), default=0)
+            end = max((span[1] for span in band_spans), default=0)
+        else:
+            begin, end = 0, new_width
+
+        for left in range(begin, end, STREAM_TILE_COLUMNS):
+            right = min(end, left + STREAM_TILE_COLUMNS)
+            if index_map is None:
+                tile = _stream_warp_tile(source, inverse_matrix, x_coords[left:right],
+                                         y_coords[start:stop], center_x, center_y, fixed_point,
+                                         interpolation)
+            else:
+                tile = _stream_copy_tile(source, index_map, start, stop, left, right)
+            if tile is not None:
+                for y in range(stop - start):
+                    band.row(y)[left * 3:right * 3] = tile.row(y)
+
+        sink.write_rows(band)
+
+
+def _source_window(width, height, inverse_matrix, x_coords, y_coords, center_x, center_y,
+                   radius=1):
+    """
+    Source region (x, y, width, height) holding every pixel that the warp
+    of these output coordinates reads, or None if it reads none
+
+    The source position is affine in the output coordinates, so its
+    extremes lie at the corners of their bounding box. The margins cover
+    the kernel taps (radius on each side), truncation toward zero and
+    rounding.
+    """
+    (m00, m01, m02), (m10, m11, m12) = inverse_matrix[0], inverse_matrix[1]
+    corners = [(out_x, out_y) for out_x in (min(x_coords), max(x_coords))
+               for out_y in (min(y_coords), max(y_coords))]
+    src_x = [m00 * out_x + m01 * out_y + m02 + center_x for out_x, out_y in corners]
+    src_y = [m10 * out_x + m11 * out_y + m12 + center_y for out_x, out_y in corners]
+
+    left = max(0, math.floor(min(src_x)) - 1 - radius)
+    top = max(0, math.floor(min(src_y)) - 1 - radius)
+    right = min(width, math.floor(max(src_x)) + 3 + radius)
+    bottom = min(height, math.floor(max(src_y)) + 3 + radius)
+    if left >= right or top >= bottom:
+        return None
+    return left, top, right - left, bottom - top
+
+
+def _stream_warp_tile(source, inverse_matrix, x_coords, y_coords, center_x, center_y,
+                      fixed_point, interpolation):
+    """Interpolate one tile from the source window it maps to"""
+    window = _source_window(source.width, source.height, inverse_matrix, x_coords, y_coords,
+                            center_x, center_y, KERNEL_RADIUS[interpolation])
+    if window is None:
+        return None
+    return _warp_serial(source.read_window(*window), source.width, source.height,
+                        inverse_matrix, x_coords, y_coords, center_x, center_y, window,
+                        fixed_point, interpolation)
+
+
+def _stream_copy_tile(source, index_map, start, stop, left, right):
+    """Copy one tile of an exact index map from the source window it uses"""
+    transposed, row_sources, column_sources = index_map
+    rows = row_sources[start:stop]
+    columns = column_sources[left:right]
+
+    # Source columns come from the output columns, or from the output rows
+    # when the map is transposed
+    x_sources, y_sources = (rows, columns) if transposed else (columns, rows)
+    x_valid = [i for i in x_sources if i >= 0]
+    y_valid = [i for i in y_sources if i >= 0]
+    if not x_valid or not y_valid:
+        return None
+    x, y = min(x_valid), min(y_valid)
+    window = source.read_window(x, y, max(x_valid) + 1 - x, max(y_valid) + 1 - y)
+
+    def shift(indices, origin):
+        return [i - origin if i >= 0 else -1 for i in indices]
+
+    if transposed:
+        rows, columns = shift(rows, x), shift(columns, y)
+    else:
+        rows, columns = shift(rows, y), shift(columns, x)
+    return _copy_pixels(window, window.width, window.height, transposed, rows, columns)
+
+
+def _linear_fit(values):
+    """
+    (start, step) such that values[i] == start + step * i up to rounding,
+    or None when the values are not evenly spaced
+    """
+    count = len(values)
+    start = values[0]
+    step = (values[-1] - start) / (count - 1) if count > 1 else 0.0
+    tolerance = 1e-6 * (abs(start) + abs(step) * count + 1)
+    for i in range(0, count, max(1, count // 64)):
+        if abs(start + step * i - values[i]) > tolerance:
+            return None
+    return start, step
+
+
+def _axis_span(start, step, low, high, count):
+    """
+    Columns x in [0, count) where low < start + step * x < high, widened
+    by one column on each side to absorb rounding
+    Returns: (begin, end) with end exclusive
+    """
+    if step == 0:
+        return (0, count) if low < start < high else (0, 0)
+    first = (low - start) / step
+    last = (high - start) / step
+    if first > last:
+        first, last = last, first
+    begin = math.floor(max(first, -1.0))
+    end = math.ceil(min(last, count + 1.0)) + 1
+    return max(0, begin), min(count, end)
+
+
+def row_spans(width, height, inverse_matrix, x_coords, y_coords, center_x, center_y,
+              radius=1):
+    """
+    Range of output columns of every row that can touch the source image
+
+    For bilinear interpolation (radius 1) a pixel is non-black only if its
+    truncated source position lies in [-1, width - 1] x [-1, height - 1],
+    i.e. -2 < src_x < width and -2 < src_y < height; the one-pixel border
+    outside the image still blends in the edge pixels. A kernel reading
+    radius taps on each side widens that border to radius pixels. Along a
+    row both source coordinates are linear in x, so the range follows from
+    the inverse matrix directly. Spans may include a few extra pixels but
+    never miss a visible one.
+
+    Returns: list of (begin, end) per output row, end exclusive
+    """
+    new_width = len(x_coords)
+    fit = _linear_fit(x_coords) if new_width else None
+    if fit is None:
+        return [(0, new_width)] * len(y_coords)
+
+    (m00, m01, m02), (m10, m11, m12) = inverse_matrix[0], inverse_matrix[1]
+    start_x, step = fit
+    spans = []
+    for out_y in y_coords:
+        x_begin, x_end = _axis_span(m00 * start_x + m01 * out_y + m02 + center_x,
+                                    m00 * step, -1 - radius, width + radius - 1, new_width)
+        y_begin, y_end = _axis_span(m10 * start_x + m11 * out_y + m12 + center_y,
+                                    m10 * step, -1 - radius, height + radius - 1, new_width)
+        begin = max(x_begin, y_begin)
+        end = min(x_end, y_end)
+        spans.append((begin, end) if begin < end else (0, 0))
+    return spans
+
+
+def _axis_indices(positions, size, replicate=True):
+    """
+    Source index per output position along one axis, or None if the
+    positions do not land on whole pixels
+
+    Positions within EXACT_TOLERANCE of integers map to those pixels
+    (copies, flips, decimation). With replicate, positions stepping by
+    exactly 1/k of a pixel in phase with the pixel grid map to the pixel
+    they fall in, so each source pixel is replicated k times. Indices
+    outside the source are -1 (black).
+    """
+    if all(abs(p - round(p)) < EXACT_TOLERANCE for p in positions):
+        indices = [round(p) for p in positions]
+    elif not replicate:
+        return None
+    else:
+        fit = _linear_fit(positions)
+        if fit is None or fit[1] == 0:
+            return None
+        factor = round(1 / abs(fit[1]))
+        if factor < 2 or abs(factor * abs(fit[1]) - 1) > EXACT_TOLERANCE:
+            return None
+        if any(abs(factor * p - round(factor * p)) > factor * EXACT_TOLERANCE for p in positions):
+            return None
+        indices = [math.floor(p + EXACT_TOLERANCE) for p in positions]
+
+    return [i if 0 <= i < size else -1 for i in indices]
+
+
+def exact_index_map(width, height, inverse_matrix, x_coords, y_coords, center_x, center_y,
+                    replicate=True):
+    """
+    Detect warps that copy whole source pixels
+
+    The inverse map must be axis-aligned (scaling, flips, shifts) or
+    transposed (rotations by 90° and 270°), i.e. each source coordinate
+    depends on only one output coordinate, and the positions along each
+    axis must land on whole pixels or, with replicate, repeat them by an
+    integer factor.
+
+    Returns:
+        (transposed, row_sources, column_sources) or None, where output
+        pixel (x, y) copies source pixel
+            (column_sources[x], row_sources[y])  if not transposed
+            (row_sources[y], column_sources[x])  if transposed
+        with -1 marking positions outside the source (black)
+    """
+    if not x_coords or not y_coords:
+        return None
+    (m00, m01, m02), (m10, m11, m12) = inverse_matrix[0], inverse_matrix[1]
+    reach_x = max(abs(x_coords[0]), abs(x_coords[-1]))
+    reach_y = max(abs(y_coords[0]), abs(y_coords[-1]))
+
+    def negligible(coefficient, reach):
+        return abs(coefficient) * reach < EXACT_TOLERANCE / 2
+
+    if negligible(m01, reach_y) and negligible(m10, reach_x):
+        transposed = False
+        column_positions = [m00 * out_x + m02 + center_x for out_x in x_coords]
+        row_positions = [m11 * out_y + m12 + center_y for out_y in y_coords]
+        column_limit, row_limit = width, height
+    elif negligible(m00, reach_x) and negligible(m11, reach_y):
+        transposed = True
+        column_positions = [m10 * out_x + m12 + center_y for out_x in x_coords]
+        row_positions = [m01 * out_y + m02 + center_x for out_y in y_coords]
+        column_limit, row_limit = height, width
+    else:
+        return None
+
+    column_sources = _axis_indices(column_positions, column_limit, replicate)
+    if column_sources is None:
+        return None
+    row_sources = _axis_indices(row_positions, row_limit, replicate)
+    if row_sources is None:
+        return None
+    return transposed, row_sources, column_sources
+
+
+def _copy_pixels(pixel_data, width, height, transposed, row_sources, column_sources):
+    """Build the output of an exact index map by copying source pixels"""
+    if np is not None:
+        source = _source_array(pixel_data)
+        if transposed:
+            source = source.transpose(1, 0, 2)
+        rows = np.asarray(row_sources)
+        columns = np.asarray(column_sources)
+
+        # Gather whole rows, then columns; -1 reads index 0 and is blanked
+        output = source.take(np.maximum(rows, 0), axis=0).take(np.maximum(columns, 0), axis=1)
+        output[rows < 0] = 0
+        output[:, columns < 0] = 0
+        if not isinstance(pixel_data, (ImageBuffer, np.ndarray)):
+            return output.tolist()
+        return _wrap_output(pixel_data, output.astype(np.uint8, copy=False))
+
+    source = _flatten(pixel_data, width, height)
+    # Offsets of every output pixel within a source row (or, when
+    # transposed, within a source column) and of every output row's source
+    if transposed:
+        column_offsets = [c * width * 3 if c >= 0 else -1 for c in column_sources]
+        row_offsets = [r * 3 if r >= 0 else -1 for r in row_sources]
+    else:
+        column_offsets = [c * 3 if c >= 0 else -1 for c in column_sources]
+        row_offsets = [r * width * 3 if r >= 0 else -1 for r in row_sources]
+    new_width = len(column_offsets)
+
+    # Plain row copies (shifts, crops) take one slice per row
+    first = column_offsets[0]
+    contiguous = not transposed and first >= 0 and \
+        column_offsets == list(range(first, first + new_width * 3, 3))
+
+    if isinstance(pixel_data, ImageBuffer):
+        black = bytes(3)
+        data = bytearray()
+        for row_offset in row_offsets:
+            if row_offset < 0:
+                data += bytes(new_width * 3)
+            elif contiguous:
+                data += source[row_offset + first:row_offset + first + new_width * 3]
+            else:
+                data += b''.join([source[row_offset + c:row_offset + c + 3] if c >= 0 else black
+                                  for c in column_offsets])
+        return ImageBuffer(new_width, len(row_offsets), data)
+
+    output = []
+    for row_offset in row_offsets:
+        if row_offset < 0:
+            output.append([[0, 0, 0] for _ in column_offsets])
+        else:
+            output.append([source[row_offset + c:row_offset + c + 3] if c >= 0 else [0, 0, 0]
+                           for c in column_offsets])
+    return output
+
+
+def _flatten(pixel_data, width, height):
+    """Source pixels as one flat B, G, R sequence, top row first"""
+    if isinstance(pixel_data, ImageBuffer):
+        return pixel_data.data
+    return [value for row in pixel_data[:height] for pixel in row[:width] for value in pixel[:3]]
+
+
+def _warp_python(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                 center_x, center_y, window=None, fixed_point=False):
+    """
+    Pure-Python warp used when NumPy is not installed
+
+    The matrix products of every column are computed once, so each output
+    pixel only adds the row terms and the centre, and the bilinear blend is
+    written out inline on a flat copy of the source. The additions happen
+    in the same order as in matrix_multiply_point, which keeps the output
+    bit-identical to the original per-pixel loop; stepping by accumulated
+    increments would drift by rounding errors.
+
+    With fixed_point, every pixel blends with integer weights (see
+    warp_affine), rounded as in _bilinear_blend_fixed.
+    """
+    new_width, new_height = len(x_coords), len(y_coords)
+    origin_x, origin_y, window_width, window_height = window or (0, 0, width, height)
+    source = _flatten(pixel_data, window_width, window_height)
+    to_bytes = isinstance(pixel_data, ImageBuffer)
+    output = bytearray(new_width * new_height * 3) if to_bytes else [0] * (new_width * new_height * 3)
+
+    (m00, m01, m02), (m10, m11, m12) = inverse_matrix[0], inverse_matrix[1]
+    col_x = [m00 * out_x for out_x in x_coords]
+    col_y = [m10 * out_x for out_x in x_coords]
+    row_stride = window_width * 3
+    origin = origin_y * row_stride + origin_x * 3
+    last_x = width - 1
+    last_y = height - 1
+    weights = FIXED_WEIGHTS
+    shift = 2 * FIXED_BITS
+
+    spans = row_spans(width, height, inverse_matrix, x_coords, y_coords, center_x, center_y)
+    for y, out_y in enumerate(y_coords):
+        row_x = m01 * out_y
+        row_y = m11 * out_y
+
+        # Only the span can reach the image; the rest of the row stays black
+        begin, end = spans[y]
+        i = (y * new_width + begin) * 3
+        for term_x, term_y in zip(col_x[begin:end], col_y[begin:end]):
+            src_x = term_x + row_x + m02 + center_x
+            src_y = term_y + row_y + m12 + center_y
+            x0 = int(src_x)
+            y0 = int(src_y)
+
+            if 0 <= src_x and 0 <= src_y and x0 < last_x and y0 < last_y:
+                # All four neighbours inside: read them straight from the source.
+                # Positions in (-1, 0) truncate to 0 and extrapolate, so they
+                # take the clamping border branch below
+                j = y0 * row_stride + x0 * 3 - origin
+                k = j + row_stride
+                b00, g00, r00, b10, g10, r10 = source[j:j + 6]
+                b01, g01, r01, b11, g11, r11 = source[k:k + 6]
+                if fixed_point:
+                    # Fractions rounded to FIXED_BITS bits; the weights sum
+                    # to 2 ** shift, so the shift truncates like int()
+                    wx0, wx1 = weights[int((src_x - x0) * FIXED_ONE + 0.5)]
+                    wy0, wy1 = weights[int((src_y - y0) * FIXED_ONE + 0.5)]
+                    w00 = wx0 * wy0
+                    w10 = wx1 * wy0
+                    w01 = wx0 * wy1
+                    w11 = wx1 * wy1
+                    output[i:i + 3] = (
+                        (b00 * w00 + b10 * w10 + b01 * w01 + b11 * w11) >> shift,
+                        (g00 * w00 + g10 * w10 + g01 * w01 + g11 * w11) >> shift,
+                        (r00 * w00 + r10 * w10 + r01 * w01 + r11 * w11) >> shift)
+                else:
+                    dx = src_x - x0
+                    dy = src_y - y0
+                    wx = 1 - dx
+                    wy = 1 - dy
+                    output[i:i + 3] = (
+                        int(b00 * wx * wy + b10 * dx * wy + b01 * wx * dy + b11 * dx * dy),
+                        int(g00 * wx * wy + g10 * dx * wy + g01 * wx * dy + g11 * dx * dy),
+                        int(r00 * wx * wy + r10 * dx * wy + r01 * wx * dy + r11 * dx * dy))
+
+            elif -1 <= x0 <= last_x and -1 <= y0 <= last_y:
+                # On the one-pixel border: missing neighbours are black
+                j = y0 * row_stride + x0 * 3 - origin
+                values = _border_blend(source, j, row_stride, x0, y0, src_x - x0, src_y - y0,
+                                       last_x, last_y, fixed_point)
+                output[i:i + 3] = [max(0, min(255, v)) for v in values] if to_bytes else values
+
+            i += 3
+
+    if to_bytes:
+        return ImageBuffer(new_width, new_height, output)
+
+    values = iter(output)
+    pixels = [[b, g, r] for b, g, r in zip(values, values, values)]
+    return [pixels[y * new_width:(y + 1) * new_width] for y in range(new_height)]
+
+
+def _border_blend(source, j, row_stride, x0, y0, dx, dy, last_x, last_y, fixed_point=False):
+    """
+    Bilinear blend of a pixel on the one-pixel border, where neighbours
+    outside the image are black
+    j is the flat offset of neighbour (x0, y0), which may lie outside
+    With fixed_point the weights are integers, as in _bilinear_blend_fixed;
+    fractions may be negative here (extrapolation), so they are floored
+    Returns: [B, G, R] truncated to ints
+    """
+    if fixed_point:
+        dx = math.floor(dx * FIXED_ONE + 0.5)
+        dy = math.floor(dy * FIXED_ONE + 0.5)
+        wx = FIXED_ONE - dx
+        wy = FIXED_ONE - dy
+    else:
+        wx = 1 - dx
+        wy = 1 - dy
+    x_in = 0 <= x0
+    x1_in = x0 < last_x
+    k = j + row_stride
+    values = []
+    for c in range(3):
+        p00 = p10 = p01 = p11 = 0
+        if 0 <= y0:
+            if x_in:
+                p00 = source[j + c]
+            if x1_in:
+                p10 = source[j + 3 + c]
+        if y0 < last_y:
+            if x_in:
+                p01 = source[k + c]
+            if x1_in:
+                p11 = source[k + 3 + c]
+        if fixed_point:
+            # Exact integer sum; shift the magnitude so it truncates toward zero
+            total = (p00 * wx + p10 * dx) * wy + (p01 * wx + p11 * dx) * dy
+            values.append(total >> (2 * FIXED_BITS) if total >= 0
+                          else -(-total >> (2 * FIXED_BITS)))
+        else:
+            values.append(int(p00 * wx * wy + p10 * dx * wy + p01 * wx * dy + p11 * dx * dy))
+    return values
+
+
+def _resample_python(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                     center_x, center_y, window, interpolation):
+    """
+    Pure-Python warp for nearest-neighbour and the table-driven kernels
+
+    Nearest picks the pixel whose centre is closest to the source
+    position. Bicubic and Lanczos read the 2r x 2r pixels around it and
+    weight each row, then the row sums, with tap weights looked up from
+    KERNEL_TABLES; taps outside the image are black. Results are truncated
+    to int like the bilinear path.
+    """
+    new_width, new_height = len(x_coords), len(y_coords)
+    origin_x, origin_y, window_width, window_height = window or (0, 0, width, height)
+    source = _flatten(pixel_data, window_width, window_height)
+    to_bytes = isinstance(pixel_data, ImageBuffer)
+    output = bytearray(new_width * new_height * 3) if to_bytes else [0] * (new_width * new_height * 3)
+
+    (m00, m01, m02), (m10, m11, m12) = inverse_matrix[0], inverse_matrix[1]
+    col_x = [m00 * out_x for out_x in x_coords]
+    col_y = [m10 * out_x for out_x in x_coords]
+    row_stride = window_width * 3
+    origin = origin_y * row_stride + origin_x * 3
+    radius = KERNEL_RADIUS[interpolation]
+    table = KERNEL_TABLES.get(interpolation)
+    nearest = interpolation == "nearest"
+
+    spans = row_spans(width, height, inverse_matrix, x_coords, y_coords, center_x, center_y,
+                      radius)
+    for y, out_y in enumerate(y_coords):
+        row_x = m01 * out_y
+        row_y = m11 * out_y
+        begin, end = spans[y]
+        i = (y * new_width + begin) * 3
+        for term_x, term_y in zip(col_x[begin:end], col_y[begin:end]):
+            src_x = term_x + row_x + m02 + center_x
+            src_y = term_y + row_y + m12 + center_y
+
+            if nearest:
+                x = math.floor(src_x + 0.5)
+                y0 = math.floor(src_y + 0.5)
+                if 0 <= x < width and 0 <= y0 < height:
+                    j = y0 * row_stride + x * 3 - origin
+                    output[i:i + 3] = source[j:j + 3]
+                i += 3
+                continue
+
+            x0 = math.floor(src_x)
+            y0 = math.floor(src_y)
+            x_weights = table[int((src_x - x0) * KERNEL_LUT_SIZE + 0.5)]
+            y_weights = table[int((src_y - y0) * KERNEL_LUT_SIZE + 0.5)]
+            taps_x = [(x, w) for x, w in zip(range(x0 - radius + 1, x0 + radius + 1), x_weights)
+                      if 0 <= x < width]
+            b = g = r = 0.0
+            for ty, wy in zip(range(y0 - radius + 1, y0 + radius + 1), y_weights):
+                if 0 <= ty < height:
+                    row_b = row_g = row_r = 0.0
+                    row_offset = ty * row_stride - origin
+                    for tx, wx in taps_x:
+                        j = row_offset + tx * 3
+                        row_b += source[j] * wx
+                        row_g += source[j + 1] * wx
+                        row_r += source[j + 2] * wx
+                    b += row_b * wy
+                    g += row_g * wy
+                    r += row_r * wy
+
+            values = (int(b), int(g), int(r))
+            output[i:i + 3] = [max(0, min(255, v)) for v in values] if to_bytes else values
+            i += 3
+
+    if to_bytes:
+        return ImageBuffer(new_width, new_height, output)
+
+    values = iter(output)
+    pixels = [[b, g, r] for b, g, r in zip(values, values, values)]
+    return [pixels[y * new_width:(y + 1) * new_width] for y in range(new_height)]
+
+
+def _source_array(pixel_data):
+    """Any supported image as a height x width x 3 array (no copy for buffers)"""
+    if isinstance(pixel_data, ImageBuffer):
+        return pixel_data.to_array()
+    return np.asarray(pixel_data)
+
+
+def _wrap_output(pixel_data, output):
+    """Return the result in the same representation as the input"""
+    if isinstance(pixel_data, ImageBuffer):
+        return ImageBuffer.from_array(output)
+    if isinstance(pixel_data, np.ndarray):
+        return output
+    return output.tolist()
+
+
+def _warp_numpy(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                center_x, center_y, window=None, fixed_point=False):
+    """Whole-array warp, processed in bands of output rows"""
+    source = _source_array(pixel_data)
+    new_width, new_height = len(x_coords), len(y_coords)
+    origin_x, origin_y, window_width, window_height = window or (0, 0, width, height)
+
+    # Lists keep raw interpolated values; buffers and arrays store bytes
+    keep_raw = not isinstance(pixel_data, (ImageBuffer, np.ndarray))
+    output = np.zeros((new_height, new_width, 3), dtype=np.int64 if keep_raw else np.uint8)
+    if new_width == 0 or new_height == 0 or width == 0 or height == 0:
+        return _wrap_output(pixel_data, output)
+
+    # Pad the source with a black border two pixels wide. Clipping the
+    # top-left neighbour to [-2, size] then keeps all four neighbours inside
+    # the padded array, and positions beyond the border still read black.
+    # Channels are stored as separate planes so every vectorized operation
+    # runs along long rows instead of 3-element pixels.
+    padded_width = window_width + 4
+    planes = np.zeros((3, window_height + 4, padded_width), dtype=source.dtype)
+    planes[:, 2:window_height + 2, 2:window_width + 2] = source.transpose(2, 0, 1)
+    planes = planes.reshape(3, -1)
+
+    (m00, m01, m02), (m10, m11, m12) = inverse_matrix[0], inverse_matrix[1]
+
+    # Column terms are shared by every row; the evaluation order matches the
+    # scalar loop exactly, so both paths produce identical values
+    out_x = np.asarray(x_coords, dtype=np.float64)
+    col_x = m00 * out_x
+    col_y = m10 * out_x
+
+    # Each band only covers the columns spanned by its rows; everything
+    # outside stays black
+    spans = row_spans(width, height, inverse_matrix, x_coords, y_coords, center_x, center_y)
+    band_rows = max(1, BAND_PIXELS // new_width)
+    for start in range(0, new_height, band_rows):
+        band = [span for span in spans[start:start + band_rows] if span[0] < span[1]]
+        if not band:
+            continue
+        begin = min(span[0] for span in band)
+        end = max(span[1] for span in band)
+
+        out_y = np.asarray(y_coords[start:start + band_rows], dtype=np.float64)[:, None]
+        src_x = col_x[begin:end] + m01 * out_y + m02 + center_x
+        src_y = col_y[begin:end] + m11 * out_y + m12 + center_y
+
+        # Casting truncates toward zero like int(), so negative positions
+        # extrapolate exactly as in the scalar loop
+        x0 = src_x.astype(np.int64)
+        y0 = src_y.astype(np.int64)
+        dx = src_x - x0
+        dy = src_y - y0
+        index = (np.clip(y0 - origin_y, -2, window_height) + 2) * padded_width + \
+            np.clip(x0 - origin_x, -2, window_width) + 2
+
+        if fixed_point:
+            value = _bilinear_blend_fixed(planes, index, padded_width, dx, dy)
+        else:
+            value = _bilinear_blend(planes, index, padded_width, dx, dy)
+        if not keep_raw:
+            np.clip(value, 0, 255, out=value)
+        output[start:start + band_rows, begin:end] = value.transpose(1, 2, 0)
+
+    return _wrap_output(pixel_data, output)
+
+
+def _bilinear_blend(planes, index, row_stride, dx, dy):
+    """
+    p00 (1-dx)(1-dy) + p10 dx (1-dy) + p01 (1-dx) dy + p11 dx dy for all
+    channels, multiplied in the same order as the scalar loop
+    """
+    wx = 1 - dx
+    wy = 1 - dy
+
+    value = np.take(planes, index, axis=1) * wx
+    value *= wy
+    term = np.take(planes, index + 1, axis=1) * dx
+    term *= wy
+    value += term
+    np.multiply(np.take(planes, index + row_stride, axis=1), wx, out=term)
+    term *= dy
+    value += term
+    np.multiply(np.take(planes, index + row_stride + 1, axis=1), dx, out=term)
+    term *= dy
+    value += term
+    return value
+
+
+def _bilinear_blend_fixed(planes, index, row_stride, dx, dy):
+    """
+    Integer bilinear blend for all channels: fractions rounded to
+    FIXED_BITS bits, rows blended with integer weights, then columns, and
+    the sum shifted back down, truncating toward zero like int()
+    """
+    fx = np.floor(dx * FIXED_ONE + 0.5).astype(np.int32)
+    fy = np.floor(dy * FIXED_ONE + 0.5).astype(np.int32)
+    wx = FIXED_ONE - fx
+    wy = FIXED_ONE - fy
+
+    value = np.take(planes, index, axis=1) * wx
+    value += np.take(planes, index + 1, axis=1) * fx
+    term = np.take(planes, index + row_stride, axis=1) * wx
+    term += np.take(planes, index + row_stride + 1, axis=1) * fx
+    value *= wy
+    term *= fy
+    value += term
+
+    # Only extrapolated edge pixels (negative fractions) can go below
+    # zero, where a plain shift would round down instead of toward zero
+    if fx.min() < 0 or fy.min() < 0:
+        value += (value < 0) * (FIXED_ONE * FIXED_ONE - 1)
+    value >>= 2 * FIXED_BITS
+    return value
+
+
+def _resample_numpy(pixel_data, width, height, inverse_matrix, x_coords, y_coords,
+                    center_x, center_y, window, interpolation):
+    """
+    Nearest-neighbour and table-driven kernel warp with NumPy, processed in
+    bands of output rows; the counterpart of _resample_python
+    """
+    source = _source_array(pixel_data)
+    new_width, new_height = len(x_coords), len(y_coords)
+    origin_x, origin_y, window_width, window_height = window or (0, 0, width, height)
+
+    keep_raw = not isinstance(pixel_data, (ImageBuffer, np.ndarray))
+    output = np.zeros((new_height, new_width, 3), dtype=np.int64 if keep_raw else np.uint8)
+    if new_width == 0 or new_height == 0 or width == 0 or height == 0:
+        return _wrap_output(pixel_data, output)
+
+    # A black border of 2 * radius pixels: clipping the first tap's pixel
+    # to [-radius - 1, size + radius - 1] keeps every tap inside the padded
+    # planes, and clipped pixels read only black, as their real taps would
+    radius = KERNEL_RADIUS[interpolation]
+    pad = 2 * radius
+    padded_width = window_width + 2 * pad
+    planes = np.zeros((3, window_height + 2 * pad, padded_width), dtype=source.dtype)
+    planes[:, pad:window_height + pad, pad:window_width + pad] = source.transpose(2, 0, 1)
+    planes = planes.reshape(3, -1)
+    if interpolation != "nearest":
+        table = np.asarray(KERNEL_TABLES[interpolation])
+
+    (m00, m01, m02), (m10, m11, m12) = inverse_matrix[0], inverse_matrix[1]
+    out_x = np.asarray(x_coords, dtype=np.float64)
+    col_x = m00 * out_x
+    col_y = m10 * out_x
+
+    spans = row_spans(width, height, inverse_matrix, x_coords, y_coords, center_x, center_y,
+                      radius)
+    band_rows = max(1, BAND_PIXELS // new_width)
+    for start in range(0, new_height, band_rows):
+        band = [span for span in spans[start:start + band_rows] if span[0] < span[1]]
+        if not band:
+            continue
+        begin = min(span[0] for span in band)
+        end = max(span[1] for span in band)
+
+        out_y = np.asarray(y_coords[start:start + band_rows], dtype=np.float64)[:, None]
+        src_x = col_x[begin:end] + m01 * out_y + m02 + center_x
+        src_y = col_y[begin:end] + m11 * out_y + m12 + center_y
+
+        if interpolation == "nearest":
+            x0 = np.floor(src_x + 0.5).astype(np.int64) - origin_x
+            y0 = np.floor(src_y + 0.5).astype(np.int64) - origin_y
+            index = (np.clip(y0, -1, window_height) + pad) * padded_width + \
+                np.clip(x0, -1, window_width) + pad
+            value = np.take(planes, index, axis=1)
+        else:
+            x0 = np.floor(src_x)
+            y0 = np.floor(src_y)
+            x_weights = table[((src_x - x0) * KERNEL_LUT_SIZE + 0.5).astype(np.intp)]
+            y_weights = table[((src_y - y0) * KERNEL_LUT_SIZE + 0.5).astype(np.intp)]
+            x0 = np.clip(x0.astype(np.int64) - origin_x, -radius - 1, window_width + radius - 1)
+            y0 = np.clip(y0.astype(np.int64) - origin_y, -radius - 1, window_height + radius - 1)
+            index = (y0 + pad - radius + 1) * padded_width + x0 + pad - radius + 1
+
+            # Weight each row of taps, then the row sums, in the same order
+            # as the scalar loop
+            value = np.zeros((3,) + index.shape)
+            for ty in range(2 * radius):
+                row = np.zeros((3,) + index.shape)
+                for tx in range(2 * radius):
+                    row += np.take(planes, index + (ty * padded_width + tx), axis=1) * \
+                        x_weights[..., tx]
+                row *= y_weights[..., ty]
+                value += row
+
+            # Float to int assignment truncates toward zero like int()
+            if not keep_raw:
+                np.clip(value, 0, 255, out=value)
+        output[start:start + band_rows, begin:end] = value.transpose(1, 2, 0)
+
+    return _wrap_output(pixel_data, output)